@@ -0,0 +1,53 @@
+"""Batch post generation throughput (posts/minute) at different concurrency caps, with stub LLM and image backends.
+
+    python -m benchmarks.bench_batch
+"""
+import asyncio
+import contextlib
+import io
+import os
+import time
+from benchmarks.stubs import StubServer, StubChatModel, make_stub_app
+from src import run_agent as agent
+from src.http_client import close_async_client
+from src.image_cache import ImageCache
+from src.image_providers import SubnpProvider, use_image_provider
+from src.llm_cache import LLMCache
+
+LLM_LATENCY = float(os.getenv("BENCH_LLM_LATENCY", 1.0))
+IMAGE_LATENCY = float(os.getenv("BENCH_IMAGE_LATENCY", 2.0))
+BATCH_SIZE = int(os.getenv("BENCH_BATCH_SIZE", 50))
+LEVELS = [int(n) for n in os.getenv("BENCH_LEVELS", "1,5,10,25,50").split(",")]
+
+
+def make_items(n):
+    return [
+        {
+            "client_info": {"name": f"Client {i}", "industry": "Tech", "about": "", "website": ""},
+            "content_goals": f"Weekly update {i} Tone of the post = Professional"
+        }
+        for i in range(n)
+    ]
+
+
+async def main():
+    print(f"{'conc':>6} {'ok':>6} {'wall':>9} {'posts/min':>10}")
+    for level in LEVELS:
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            outcomes = await agent.run_agent_batch(make_items(BATCH_SIZE), concurrency=level)
+        wall = time.perf_counter() - started
+        ok = sum(1 for o in outcomes if o["status"] == "ok")
+        print(f"{level:>6} {ok:>6} {wall:>8.2f}s {ok / wall * 60:>10.1f}")
+    await close_async_client()
+
+
+if __name__ == "__main__":
+    app = make_stub_app(llm_latency=LLM_LATENCY, image_latency=IMAGE_LATENCY)
+    with StubServer(app) as server:
+        use_image_provider(SubnpProvider(url=f"{server.url}/generate"))
+        agent.image_cache = ImageCache(backend=None, max_entries=0)
+        agent.llm_cache = LLMCache(ttl=0)
+        agent.get_llm = lambda: StubChatModel(endpoint=f"{server.url}/chat")
+        print(f"stub llm={LLM_LATENCY}s image={IMAGE_LATENCY}s, batch of {BATCH_SIZE}")
+        asyncio.run(main())
@@ -0,0 +1,83 @@
+"""Crawl a local static client site at different concurrency levels.
+
+The site has a blog deeper than the page budget, duplicate URLs (index.html,
+tracking params, trailing slashes), a robots.txt-disallowed section, a login
+page and off-site links. Reports pages/sec and checks the crawl never leaves
+the rules.
+
+    python -m benchmarks.bench_crawler
+"""
+import os
+import time
+from benchmarks.stubs import StubServer, make_static_site_app
+import src.html_extract as html_extract
+from src.crawler import crawl_site
+
+PAGE_LATENCY = float(os.getenv("BENCH_PAGE_LATENCY", 0.2))
+MAX_PAGES = int(os.getenv("BENCH_MAX_PAGES", 12))
+LEVELS = [int(n) for n in os.getenv("BENCH_LEVELS", "1,4,8").split(",")]
+BLOG_POSTS = 30
+
+
+def page(title, body, links=()):
+    nav = "".join(f'<a href="{href}">{href}</a>' for href in links)
+    return (
+        f"<html><head><title>{title}</title></head><body><nav>{nav}</nav>"
+        f"<main><h1>{title}</h1><p>{body}</p></main><footer>© Acme</footer></body></html>"
+    )
+
+
+def build_site():
+    home_links = [
+        "/about/", "/services", "/blog", "/index.html", "/about?utm_source=newsletter", "/login",
+        "/private/report", "/brochure.pdf", "mailto:hi@acme.test", "https://twitter.com/acme",
+    ]
+    home = page("Acme Analytics", "Acme helps mid-sized retailers forecast demand with machine learning.", home_links)
+    pages = {
+        "/": home,
+        "/index.html": home,
+        "/about": page("About", "Founded in 2015, Acme has worked with forty retail brands.", ["/", "/team"]),
+        "/team": page("Team", "Our data scientists come from retail and logistics.", ["/about"]),
+        "/services": page("Services", "Demand forecasting, dashboards and staff training.", ["/services/forecasting"]),
+        "/services/forecasting": page("Forecasting", "Forecasts that cut inventory waste by a third.", ["/services"]),
+        "/blog": page("Blog", "Notes from the field.", [f"/blog/post-{i}" for i in range(BLOG_POSTS)]),
+        "/login": page("Login", "Sign in.", []),
+        "/private/report": page("Private", "Should never be fetched.", []),
+        "/robots.txt": "User-agent: *\nDisallow: /private/\n",
+    }
+    for i in range(BLOG_POSTS):
+        pages[f"/blog/post-{i}"] = page(f"Post {i}", f"Retail forecasting lesson number {i}.", ["/blog", f"/blog/post-{i + 1}"])
+    return pages
+
+
+def main():
+    # The stub site is on 127.0.0.1, which real crawls refuse
+    html_extract.FETCH_ALLOW_PRIVATE_HOSTS = True
+    print(f"{PAGE_LATENCY}s per page, budget {MAX_PAGES} pages")
+    print(f"{'conc':>6} {'pages':>6} {'fetches':>8} {'wall':>7} {'pages/s':>8}  checks")
+    for level in LEVELS:
+        app = make_static_site_app(build_site(), latency=PAGE_LATENCY)
+        with StubServer(app) as server:
+            started = time.perf_counter()
+            site = crawl_site(server.url, max_pages=MAX_PAGES, concurrency=level)
+            wall = time.perf_counter() - started
+
+        hits = [path for path in app.state.hits if path != "/robots.txt"]
+        urls = [p["url"] for p in site["pages"]]
+        problems = []
+        if any(path.startswith(("/private", "/login")) for path in hits):
+            problems.append("fetched a disallowed page")
+        if len(hits) > MAX_PAGES:
+            problems.append(f"{len(hits)} fetches over budget")
+        if len(set(p["content_hash"] for p in site["pages"])) != len(urls):
+            problems.append("duplicate content stored")
+        if not any(url.endswith("/about") for url in urls):
+            problems.append("missed /about")
+        print(
+            f"{level:>6} {len(urls):>6} {len(hits):>8} {wall:>6.2f}s {len(hits) / wall:>8.1f}  "
+            f"{'; '.join(problems) or 'ok'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""HTML-to-text throughput (MB/s) and peak RSS: the old BeautifulSoup path vs src.html_extract.
+
+Point BENCH_HTML_DIR at a folder of saved pages (*.html); without it a synthetic
+corpus of marketing-style pages is generated. Each backend runs in a fresh
+process so peak RSS isn't shared between them. Needs bs4 for the baseline:
+pip install -r benchmarks/requirements.txt
+
+    BENCH_HTML_DIR=~/saved-pages python -m benchmarks.bench_html_extract
+"""
+import os
+import glob
+import random
+import resource
+import tempfile
+import time
+import multiprocessing
+
+HTML_DIR = os.getenv("BENCH_HTML_DIR")
+PAGES = int(os.getenv("BENCH_PAGES", 40))
+# Passes over the corpus per backend
+ROUNDS = int(os.getenv("BENCH_ROUNDS", 3))
+
+WORDS = "we help teams ship faster with data driven strategy for growth clients results design cloud".split()
+
+
+def synthetic_page(size):
+    """Nav, inline scripts/styles and footer around real-looking paragraphs, about `size` bytes"""
+    nav = "".join(f'<li><a href="/p{i}">Link {i}</a></li>' for i in range(60))
+    parts = [
+        "<!doctype html><html><head><title>Acme</title>",
+        '<meta name="description" content="Acme builds analytics for retailers.">',
+        f"<style>{'.c{color:red} ' * 400}</style>",
+        f"<script>var data = {[random.random() for _ in range(2000)]};</script></head><body>",
+        f"<header><nav><ul>{nav}</ul></nav></header><main>",
+    ]
+    written = sum(len(p) for p in parts)
+    while written < size:
+        paragraph = "<section><h2>Heading</h2><p>" + " ".join(random.choices(WORDS, k=120)) + ".</p></section>"
+        parts.append(paragraph)
+        written += len(paragraph)
+    parts.append(f"</main><footer><ul>{nav}</ul></footer></body></html>")
+    return "".join(parts).encode("utf-8")
+
+
+def build_corpus(directory):
+    sizes = [50_000, 200_000, 800_000, 2_000_000]
+    for i in range(PAGES):
+        with open(os.path.join(directory, f"page{i}.html"), "wb") as f:
+            f.write(synthetic_page(sizes[i % len(sizes)]))
+
+
+def bs4_text(body):
+    # What get_user_details used to do with every page
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(body, "html.parser").get_text(separator=" ", strip=True)
+
+
+def lxml_text(body):
+    from src.html_extract import extract_text
+    return extract_text(body)
+
+
+BACKENDS = {"bs4 html.parser": bs4_text, "lxml extract_text": lxml_text}
+
+
+def rss_mb():
+    # ru_maxrss is KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_backend(name, paths, results):
+    extract = BACKENDS[name]
+    extract(b"<html><body>warm up</body></html>")
+    baseline = rss_mb()
+    total_bytes = chars = 0
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        for path in paths:
+            with open(path, "rb") as f:
+                body = f.read()
+            total_bytes += len(body)
+            chars += len(extract(body))
+    elapsed = time.perf_counter() - started
+    results.put((name, total_bytes, elapsed, chars, baseline, rss_mb()))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = HTML_DIR or tmp
+        if not HTML_DIR:
+            build_corpus(tmp)
+        paths = sorted(glob.glob(os.path.join(os.path.expanduser(directory), "*.html")))
+        corpus_mb = sum(os.path.getsize(p) for p in paths) / 1e6
+        print(f"{len(paths)} pages, {corpus_mb:.1f} MB, {ROUNDS} round(s) per backend")
+        print(f"{'backend':<20} {'MB/s':>8} {'pages/s':>8} {'text chars':>11} {'base RSS':>9} {'peak RSS':>9}")
+
+        ctx = multiprocessing.get_context("spawn")
+        for name in BACKENDS:
+            results = ctx.Queue()
+            process = ctx.Process(target=run_backend, args=(name, paths, results))
+            process.start()
+            name, total_bytes, elapsed, chars, baseline, peak = results.get()
+            process.join()
+            print(
+                f"{name:<20} {total_bytes / 1e6 / elapsed:>8.1f} {len(paths) * ROUNDS / elapsed:>8.1f} "
+                f"{chars // ROUNDS:>11} {baseline:>7.0f}MB {peak:>7.0f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
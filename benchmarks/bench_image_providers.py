@@ -0,0 +1,73 @@
+"""Image provider throughput (images/sec) and tail latency at different concurrency levels.
+
+Compares the in-process stub provider with the subnp provider pointed at the
+local stub server; add "subnp" to BENCH_PROVIDERS to hit the real API.
+
+    python -m benchmarks.bench_image_providers
+"""
+import asyncio
+import os
+import time
+from benchmarks.stubs import StubServer, make_stub_app, percentile
+from src.http_client import close_async_client
+from src.image_providers import IMAGE_PROVIDERS, StubProvider, SubnpProvider
+
+IMAGE_LATENCY = float(os.getenv("BENCH_IMAGE_LATENCY", 1.0))
+IMAGE_JITTER = float(os.getenv("BENCH_IMAGE_JITTER", 0.5))
+FAILURE_RATE = float(os.getenv("BENCH_FAILURE_RATE", 0.05))
+# Stub server keeps each response open this long after the final event
+IMAGE_TAIL = float(os.getenv("BENCH_IMAGE_TAIL", 0.5))
+IMAGES = int(os.getenv("BENCH_IMAGES", 64))
+LEVELS = [int(n) for n in os.getenv("BENCH_LEVELS", "1,4,16,64").split(",")]
+PROVIDERS = os.getenv("BENCH_PROVIDERS", "stub,stub-server").split(",")
+
+
+async def run_level(provider, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one(i):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await provider.agenerate(f"Benchmark visual concept {i}")
+            except Exception:
+                failures += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(IMAGES)))
+    wall = time.perf_counter() - started
+    return wall, latencies, failures
+
+
+async def bench(label, provider):
+    print(f"\n{label}")
+    print(f"{'conc':>6} {'ok':>5} {'fail':>5} {'img/s':>8} {'p50':>7} {'p95':>7} {'p99':>7}")
+    for level in LEVELS:
+        wall, latencies, failures = await run_level(provider, level)
+        print(
+            f"{level:>6} {len(latencies):>5} {failures:>5} {len(latencies) / wall:>8.2f} "
+            f"{percentile(latencies, 0.50):>6.2f}s {percentile(latencies, 0.95):>6.2f}s {percentile(latencies, 0.99):>6.2f}s"
+        )
+    await close_async_client()
+
+
+def main():
+    print(f"{IMAGES} images per level, latency={IMAGE_LATENCY}s +0..{IMAGE_JITTER}s, tail={IMAGE_TAIL}s, failure rate={FAILURE_RATE}")
+    app = make_stub_app(image_latency=IMAGE_LATENCY, image_jitter=IMAGE_JITTER, image_failure_rate=FAILURE_RATE, image_tail=IMAGE_TAIL)
+    with StubServer(app) as server:
+        for name in PROVIDERS:
+            if name == "stub":
+                provider = StubProvider(latency=IMAGE_LATENCY, jitter=IMAGE_JITTER, failure_rate=FAILURE_RATE)
+            elif name == "stub-server":
+                provider = SubnpProvider(url=f"{server.url}/generate")
+            else:
+                provider = IMAGE_PROVIDERS[name]()
+            asyncio.run(bench(f"{name} ({type(provider).__name__}, model={provider.model})", provider))
+
+
+if __name__ == "__main__":
+    main()
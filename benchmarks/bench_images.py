@@ -0,0 +1,56 @@
+"""Carousel image latency: sequential vs concurrent prompts, and the deadline path, against a stub server.
+
+    python -m benchmarks.bench_images
+"""
+import asyncio
+import contextlib
+import io
+import os
+import time
+from benchmarks.stubs import StubServer, make_stub_app
+from src import run_agent as agent
+from src.http_client import close_async_client
+from src.image_cache import ImageCache
+from src.image_providers import SubnpProvider, use_image_provider
+
+IMAGE_LATENCY = float(os.getenv("BENCH_IMAGE_LATENCY", 1.0))
+IMAGE_JITTER = float(os.getenv("BENCH_IMAGE_JITTER", 0.5))
+SLOW_LATENCY = float(os.getenv("BENCH_SLOW_LATENCY", 10.0))
+ROUNDS = int(os.getenv("BENCH_ROUNDS", 3))
+
+PROMPTS = ["Professional visual concept 1", "Supporting visual concept 2", "Engaging visual concept 3"]
+WITH_SLOW = ["Professional visual concept 1", "slow visual concept 2", "Engaging visual concept 3"]
+
+
+def timed(label, fn):
+    walls = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            images = fn()
+        walls.append(time.perf_counter() - started)
+    fallbacks = sum(1 for url in images if url in agent.FALLBACK_IMAGE_URLS)
+    print(f"{label:<34} mean={sum(walls) / len(walls):6.2f}s  max={max(walls):6.2f}s  fallbacks={fallbacks}/{len(images)}")
+
+
+if __name__ == "__main__":
+    app = make_stub_app(image_latency=IMAGE_LATENCY, image_jitter=IMAGE_JITTER, slow_latency=SLOW_LATENCY)
+    with StubServer(app) as server:
+        use_image_provider(SubnpProvider(url=f"{server.url}/generate"))
+        # Measure generation itself, not cache hits on the repeated prompts
+        agent.image_cache = ImageCache(backend=None, max_entries=0)
+        print(f"stub image latency={IMAGE_LATENCY}s +0..{IMAGE_JITTER}s, slow prompt={SLOW_LATENCY}s, rounds={ROUNDS}")
+
+        timed("sync sequential (parallelism=1)", lambda: agent.generate_images_direct(PROMPTS, parallelism=1))
+        timed("sync concurrent (parallelism=3)", lambda: agent.generate_images_direct(PROMPTS, parallelism=3))
+        timed("sync slow prompt, deadline=3s", lambda: agent.generate_images_direct(WITH_SLOW, deadline=3))
+
+        async def run_async(topics, **kwargs):
+            try:
+                return await agent.generate_images_async(topics, **kwargs)
+            finally:
+                await close_async_client()
+
+        timed("async sequential (parallelism=1)", lambda: asyncio.run(run_async(PROMPTS, parallelism=1)))
+        timed("async concurrent (parallelism=3)", lambda: asyncio.run(run_async(PROMPTS, parallelism=3)))
+        timed("async slow prompt, deadline=3s", lambda: asyncio.run(run_async(WITH_SLOW, deadline=3)))
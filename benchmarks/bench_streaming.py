@@ -0,0 +1,56 @@
+"""LLM/image overlap: one post with the completion streamed vs. awaited whole, against the stub server.
+
+With streaming, image prompt #1 starts while the LLM is still writing #2 and #3.
+
+    python -m benchmarks.bench_streaming
+"""
+import asyncio
+import contextlib
+import io
+import os
+import time
+from benchmarks.stubs import StubServer, StubChatModel, make_stub_app
+from src import run_agent as agent
+from src.http_client import close_async_client
+from src.image_cache import ImageCache
+from src.image_providers import SubnpProvider, use_image_provider
+from src.llm_cache import LLMCache
+
+LLM_LATENCY = float(os.getenv("BENCH_LLM_LATENCY", 3.0))
+IMAGE_LATENCY = float(os.getenv("BENCH_IMAGE_LATENCY", 2.0))
+ROUNDS = int(os.getenv("BENCH_ROUNDS", 3))
+
+CLIENT_INFO = {"name": "Bench Client", "industry": "Tech", "about": "", "website": ""}
+
+
+async def one_post(i):
+    """Seconds to the first image event and to the finished post"""
+    started = time.perf_counter()
+    first_image = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        async for event in agent.run_agent_stream(CLIENT_INFO, "carousel", "Tech", f"Streaming benchmark {i}"):
+            if event["event"] == "image" and first_image is None:
+                first_image = time.perf_counter() - started
+    return first_image, time.perf_counter() - started
+
+
+async def main():
+    print(f"{'mode':<10} {'first image':>12} {'post done':>10}")
+    for streaming in (False, True):
+        agent.LLM_STREAMING = streaming
+        runs = [await one_post(i) for i in range(ROUNDS)]
+        first = sum(r[0] for r in runs) / len(runs)
+        done = sum(r[1] for r in runs) / len(runs)
+        print(f"{'stream' if streaming else 'invoke':<10} {first:>11.2f}s {done:>9.2f}s")
+    await close_async_client()
+
+
+if __name__ == "__main__":
+    app = make_stub_app(llm_latency=LLM_LATENCY, image_latency=IMAGE_LATENCY)
+    with StubServer(app) as server:
+        use_image_provider(SubnpProvider(url=f"{server.url}/generate"))
+        agent.image_cache = ImageCache(backend=None, max_entries=0)
+        agent.llm_cache = LLMCache(ttl=0)
+        agent.get_llm = lambda: StubChatModel(endpoint=f"{server.url}/chat")
+        print(f"stub llm={LLM_LATENCY}s (streamed in chunks) image={IMAGE_LATENCY}s, rounds={ROUNDS}")
+        asyncio.run(main())
@@ -0,0 +1,106 @@
+"""Peak RSS of profile upload parsing as the upload grows: the old read-everything path vs read_profile_upload.
+
+Each case runs in a fresh process with a local uvicorn server, posting a file
+streamed from disk, so the numbers are the server's parsing cost plus a
+constant baseline. The database write is left out; it's the same either way.
+
+    python -m benchmarks.bench_upload
+"""
+import os
+import io
+import csv
+import time
+import zipfile
+import resource
+import tempfile
+import multiprocessing
+
+SIZES_MB = [int(n) for n in os.getenv("BENCH_UPLOAD_MB", "1,10,50").split(",")]
+HEADER = ["First Name", "Last Name", "Summary", "Industry", "Websites"]
+
+
+def write_csv(path, size):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerow(["Ann", "Lee", "Retail analytics lead. " * 10, "Retail", "[COMPANY:acme.test]"])
+        while f.tell() < size:
+            writer.writerow(["Filler", "Row", "x" * 500, "Retail", ""])
+
+
+def write_archive(path, size):
+    # A data archive: a small Profile.csv next to much bigger exports
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([HEADER, ["Ann", "Lee", "Retail analytics lead.", "Retail", "[COMPANY:acme.test]"]])
+        archive.writestr("Basic_LinkedInDataExport/Profile.csv", buffer.getvalue())
+        with archive.open("Basic_LinkedInDataExport/messages.csv", "w") as member:
+            written = 0
+            chunk = os.urandom(1024 * 1024)
+            while written < size:
+                member.write(chunk)
+                written += len(chunk)
+
+
+def make_app():
+    from fastapi import FastAPI, File, UploadFile
+    from fastapi.concurrency import run_in_threadpool
+    from src.profile_import import read_profile_upload
+
+    app = FastAPI()
+
+    @app.post("/old")
+    async def old(file: UploadFile = File(...)):
+        # What /upload-csv used to do before the DB write
+        rows = list(csv.DictReader(io.StringIO((await file.read()).decode("utf-8"))))
+        return {"rows": len(rows), "data": rows}
+
+    @app.post("/new")
+    async def new(file: UploadFile = File(...)):
+        upload = await run_in_threadpool(read_profile_upload, file.file, file.filename, file.size)
+        return {key: upload[key] for key in ("format", "source", "bytes", "fields_found")}
+
+    return app
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_case(route, path, results):
+    import httpx
+    from benchmarks.stubs import StubServer
+
+    with StubServer(make_app()) as server:
+        baseline = rss_mb()
+        started = time.perf_counter()
+        with open(path, "rb") as f:
+            response = httpx.post(f"{server.url}/{route}", files={"file": (os.path.basename(path), f)}, timeout=300)
+        elapsed = time.perf_counter() - started
+        results.put((response.status_code, len(response.content), elapsed, baseline, rss_mb()))
+
+
+def main():
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'upload':<14} {'route':<5} {'status':>6} {'resp KB':>8} {'time':>7} {'RSS growth':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in SIZES_MB:
+            cases = []
+            csv_path = os.path.join(tmp, f"Profile-{size_mb}.csv")
+            write_csv(csv_path, size_mb * 1024 * 1024)
+            cases += [(f"{size_mb}MB csv", "old", csv_path), (f"{size_mb}MB csv", "new", csv_path)]
+            zip_path = os.path.join(tmp, f"archive-{size_mb}.zip")
+            write_archive(zip_path, size_mb * 1024 * 1024)
+            cases.append((f"{size_mb}MB zip", "new", zip_path))
+
+            for label, route, path in cases:
+                results = ctx.Queue()
+                process = ctx.Process(target=run_case, args=(route, path, results))
+                process.start()
+                status, response_bytes, elapsed, baseline, peak = results.get()
+                process.join()
+                print(f"{label:<14} {route:<5} {status:>6} {response_bytes / 1024:>8.1f} {elapsed:>6.2f}s {peak - baseline:>9.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Concurrency scaling of the async /makepost pipeline against local stub LLM and image servers.
+
+    python -m benchmarks.load_makepost
+
+Every run happens on one event loop (one worker); with the pipeline fully async
+wall time should stay near a single generation's latency as concurrency grows.
+"""
+import asyncio
+import contextlib
+import io
+import os
+import time
+from benchmarks.stubs import StubServer, StubChatModel, make_stub_app, percentile
+from src import run_agent as agent
+from src.http_client import close_async_client
+from src.image_cache import ImageCache
+from src.image_providers import SubnpProvider, use_image_provider
+from src.llm_cache import LLMCache
+
+LLM_LATENCY = float(os.getenv("BENCH_LLM_LATENCY", 1.0))
+IMAGE_LATENCY = float(os.getenv("BENCH_IMAGE_LATENCY", 2.0))
+LEVELS = [int(n) for n in os.getenv("BENCH_LEVELS", "1,10,50,200").split(",")]
+
+CLIENT_INFO = {"name": "Bench User", "industry": "Tech", "about": "", "website": ""}
+
+
+async def one_post(i, latencies):
+    started = time.perf_counter()
+    # Distinct goals so the LLM cache's single-flight doesn't collapse the load
+    result = await agent.run_agent_async(CLIENT_INFO, "carousel", "Tech", f"Benchmark post {i}")
+    latencies.append(time.perf_counter() - started)
+    return result is not None
+
+
+async def run_level(concurrency):
+    latencies = []
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = await asyncio.gather(*(one_post(i, latencies) for i in range(concurrency)))
+    wall = time.perf_counter() - started
+    ok = sum(results)
+    print(f"{concurrency:>6} {ok:>6} {wall:>9.2f}s {ok / wall:>10.1f} {percentile(latencies, 0.5):>8.2f}s {percentile(latencies, 0.95):>8.2f}s")
+
+
+async def main():
+    print(f"{'conc':>6} {'ok':>6} {'wall':>10} {'posts/s':>10} {'p50':>9} {'p95':>9}")
+    for level in LEVELS:
+        await run_level(level)
+    await close_async_client()
+
+
+if __name__ == "__main__":
+    app = make_stub_app(llm_latency=LLM_LATENCY, image_latency=IMAGE_LATENCY)
+    with StubServer(app) as server:
+        use_image_provider(SubnpProvider(url=f"{server.url}/generate"))
+        # Measure generation itself, not cache hits on the repeated prompts
+        agent.image_cache = ImageCache(backend=None, max_entries=0)
+        agent.llm_cache = LLMCache(ttl=0)
+        agent.get_llm = lambda: StubChatModel(endpoint=f"{server.url}/chat")
+        print(f"stub llm={LLM_LATENCY}s image={IMAGE_LATENCY}s (3 images per post)")
+        asyncio.run(main())
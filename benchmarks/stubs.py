@@ -0,0 +1,162 @@
+"""Local stand-ins for the LLM and image APIs used by the benchmarks.
+
+The stub server sleeps for a configurable latency and answers in the same
+shape as the real services (subnp's event-stream body, a JSON chat reply).
+make_static_site_app serves a fixed set of pages for crawling a client site.
+"""
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+import requests
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response, StreamingResponse
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from src.http_client import get_async_client
+
+STUB_POST = {
+    "content_draft": "Stub post body for benchmarking.",
+    "hashtag_suggestions": ["#bench", "#stub"],
+    "image_instructions": ["Professional visual concept 1", "Supporting visual concept 2", "Engaging visual concept 3"],
+}
+
+
+def make_stub_app(llm_latency=1.0, image_latency=2.0, image_jitter=0.0, image_failure_rate=0.0, slow_latency=None, image_tail=0.0):
+    """Prompts containing "slow" take `slow_latency` seconds instead of `image_latency`.
+
+    /generate streams a progress event first and the final event after the
+    latency, then holds the response open for `image_tail` more seconds.
+    """
+    app = FastAPI()
+    app.state.llm_latency = llm_latency
+    app.state.image_latency = image_latency
+    app.state.image_jitter = image_jitter
+    app.state.image_failure_rate = image_failure_rate
+    app.state.slow_latency = slow_latency
+    app.state.image_tail = image_tail
+
+    @app.post("/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        text = json.dumps(STUB_POST)
+        if not body.get("stream"):
+            await asyncio.sleep(app.state.llm_latency)
+            return PlainTextResponse(text)
+
+        # Same total latency, spread over the reply like token streaming
+        pieces = [text[i:i + 8] for i in range(0, len(text), 8)]
+
+        async def tokens():
+            for piece in pieces:
+                await asyncio.sleep(app.state.llm_latency / len(pieces))
+                yield piece
+
+        return StreamingResponse(tokens(), media_type="text/plain")
+
+    @app.post("/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        delay = app.state.image_latency + random.uniform(0, app.state.image_jitter)
+        if app.state.slow_latency is not None and "slow" in str(body.get("prompt", "")):
+            delay = app.state.slow_latency
+        if random.random() < app.state.image_failure_rate:
+            await asyncio.sleep(delay)
+            return PlainTextResponse('data: {"status": "error", "message": "stub failure"}', status_code=500)
+        event = {"status": "success", "imageUrl": f"https://stub.local/{uuid.uuid4().hex}.jpg", "prompt": body.get("prompt")}
+
+        async def events():
+            yield 'data: {"status": "processing", "message": "Generating"}\n\n'
+            await asyncio.sleep(delay)
+            yield "data: " + json.dumps(event)
+            await asyncio.sleep(app.state.image_tail)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def make_static_site_app(pages, latency=0.0):
+    """Serves {path: html} (plus "/robots.txt" as text); `app.state.hits` lists requested paths"""
+    app = FastAPI()
+    app.state.hits = []
+
+    @app.get("/{path:path}")
+    async def page(path: str):
+        path = "/" + path
+        app.state.hits.append(path)
+        await asyncio.sleep(latency)
+        if path not in pages:
+            return Response(status_code=404)
+        if path.endswith(".txt"):
+            return PlainTextResponse(pages[path])
+        return HTMLResponse(pages[path])
+
+    return app
+
+
+class StubServer:
+    """Runs the stub app with uvicorn on a background thread"""
+
+    def __init__(self, app, host="127.0.0.1"):
+        self.app = app
+        self.host = host
+        with socket.socket() as sock:
+            sock.bind((host, 0))
+            self.port = sock.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(app, host=host, port=self.port, log_level="warning", backlog=4096))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+
+class StubChatModel(BaseChatModel):
+    """Chat model that calls the stub /chat endpoint instead of Cohere"""
+
+    endpoint: str
+
+    @property
+    def _llm_type(self):
+        return "stub"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        text = requests.post(self.endpoint, json={}, timeout=60).text
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        response = await get_async_client().post(self.endpoint, json={}, timeout=60)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=response.text))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        with requests.post(self.endpoint, json={"stream": True}, timeout=60, stream=True) as response:
+            for text in response.iter_content(chunk_size=None, decode_unicode=True):
+                yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        async with get_async_client().stream("POST", self.endpoint, json={"stream": True}, timeout=60) as response:
+            async for text in response.aiter_text():
+                yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * pct))]
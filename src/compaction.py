@@ -0,0 +1,57 @@
+import os
+import time
+from dotenv import load_dotenv
+from src.db import get_conn
+load_dotenv()
+
+# ---------------- COMPACTION CONFIG ----------------
+# Rows deleted per transaction, so locks stay short on a live table
+COMPACTION_BATCH_SIZE = int(os.getenv("COMPACTION_BATCH_SIZE", 5000))
+
+
+def compact_user_details(batch_size=COMPACTION_BATCH_SIZE):
+    """Delete superseded profile rows, keeping each user's latest; returns rows deleted.
+
+    Before the unique key on user_details.user_id every upload and every
+    GET /user appended a row. Walks the table in id order, `batch_size` rows
+    per transaction, so it can go ahead of the migration that adds the key;
+    each "is there a newer row" check is a lookup on the user_id index.
+    """
+    deleted = 0
+    last_id = 0
+    while True:
+        with get_conn() as conn:
+            cur = conn.cursor()
+            # Profiles without a user all count as one; their newest id is looked up once per batch
+            cur.execute("""
+            WITH batch AS (
+                SELECT id, user_id FROM user_details WHERE id > %s ORDER BY id LIMIT %s
+            ), latest_anonymous AS (
+                SELECT max(id) AS id FROM user_details WHERE user_id IS NULL
+            ), superseded AS (
+                SELECT b.id FROM batch b
+                WHERE (b.user_id IS NOT NULL AND EXISTS (
+                          SELECT 1 FROM user_details newer WHERE newer.user_id = b.user_id AND newer.id > b.id))
+                   OR (b.user_id IS NULL AND b.id < (SELECT id FROM latest_anonymous))
+            ), removed AS (
+                DELETE FROM user_details WHERE id IN (SELECT id FROM superseded) RETURNING id
+            )
+            SELECT (SELECT max(id) FROM batch), (SELECT count(*) FROM removed)
+            """, (last_id, batch_size))
+            last_id, removed = cur.fetchone()
+            conn.commit()
+            cur.close()
+        if last_id is None:
+            return deleted
+        deleted += removed
+        if removed:
+            print(f"🧹 Removed {deleted} superseded user_details row(s) so far (up to id {last_id})")
+        # Let autovacuum and other writers keep up between batches
+        time.sleep(0.1)
+
+
+if __name__ == "__main__":
+    # Ahead of deploying migration 11 on a large table: python -m src.compaction
+    started = time.perf_counter()
+    removed = compact_user_details()
+    print(f"🚀 Compacted user_details: {removed} row(s) removed in {time.perf_counter() - started:.1f}s")
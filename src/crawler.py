@@ -0,0 +1,222 @@
+import os
+import time
+import hashlib
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
+import requests
+from src.html_extract import fetch_html, extract_page, guarded_get
+
+# ---------------- CRAWLER CONFIG ----------------
+# Pages fetched per site (home page included) and link hops from the home page
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", 12))
+CRAWL_MAX_DEPTH = int(os.getenv("CRAWL_MAX_DEPTH", 2))
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", 4))
+CRAWL_TIMEOUT = 10
+# Longest robots.txt Crawl-delay we honour; sites asking for more are crawled at this pace
+CRAWL_MAX_DELAY = 5.0
+
+CRAWL_USER_AGENT = "Mozilla/5.0 (compatible; InfluenceOS-Enrichment/1.0)"
+ROBOTS_AGENT = "InfluenceOS-Enrichment"
+# Pages that say the most about a business are fetched first when the budget is tight
+PRIORITY_WORDS = (
+    "about", "service", "solution", "product", "what-we-do", "work", "case", "client",
+    "team", "company", "mission", "blog", "insight", "news",
+)
+SKIP_EXTENSIONS = (
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".css", ".js", ".json", ".xml",
+    ".zip", ".gz", ".mp3", ".mp4", ".mov", ".avi", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx",
+)
+SKIP_PATH_WORDS = ("login", "signin", "sign-in", "signup", "register", "cart", "checkout", "account", "wp-admin")
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref"}
+
+
+class CrawlError(Exception):
+    """The site can't be crawled at all (robots.txt, unreachable home page)"""
+
+
+# ---------------- URLS ----------------
+def host_key(netloc):
+    """Host without www. and default ports, for same-site comparisons"""
+    host = netloc.lower()
+    for port in (":80", ":443"):
+        if host.endswith(port):
+            host = host[: -len(port)]
+    return host[4:] if host.startswith("www.") else host
+
+
+def normalize_url(url, base=None):
+    """Canonical absolute form used for dedupe, or None for links we never follow"""
+    if base:
+        url = urljoin(base, url.strip())
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https") or not parts.netloc:
+        return None
+
+    netloc = parts.netloc.lower()
+    if (scheme, netloc[-3:]) == ("http", ":80") or (scheme, netloc[-4:]) == ("https", ":443"):
+        netloc = netloc.rsplit(":", 1)[0]
+    # /about/, /about and /team/../about are the same page
+    path = posixpath.normpath(parts.path or "/").rstrip("/") or "/"
+    if path.lower().endswith(SKIP_EXTENSIONS):
+        return None
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not (key.lower().startswith("utm_") or key.lower() in TRACKING_PARAMS)
+    ))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def same_site(url, root):
+    return host_key(urlsplit(url).netloc) == host_key(urlsplit(root).netloc)
+
+
+def link_priority(url):
+    """Lower sorts first: pages about the business, then shallow paths"""
+    path = urlsplit(url).path.lower()
+    if any(word in path for word in SKIP_PATH_WORDS):
+        return None
+    rank = next((i for i, word in enumerate(PRIORITY_WORDS) if word in path), len(PRIORITY_WORDS))
+    return (rank, path.count("/"), len(path))
+
+
+# ---------------- ROBOTS.TXT ----------------
+def load_robots(root_url):
+    """RobotFileParser for the site; a missing robots.txt allows everything, 401/403 nothing"""
+    robots = RobotFileParser()
+    robots_url = urlunsplit(urlsplit(root_url)[:2] + ("/robots.txt", "", ""))
+    try:
+        response = guarded_get(robots_url, headers={"User-Agent": CRAWL_USER_AGENT}, timeout=CRAWL_TIMEOUT)
+    except requests.RequestException:
+        robots.allow_all = True
+        return robots
+    if response.status_code in (401, 403):
+        robots.disallow_all = True
+    elif response.status_code >= 400:
+        robots.allow_all = True
+    else:
+        robots.parse(response.text.splitlines())
+    return robots
+
+
+class PacedFetcher:
+    """Enforces the site's Crawl-delay across the crawl's threads"""
+
+    def __init__(self, delay):
+        self.delay = min(delay or 0.0, CRAWL_MAX_DELAY)
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.delay:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.delay
+        time.sleep(start - now)
+
+
+# ---------------- CRAWL ----------------
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def fetch_page(url, depth, pacer, headers=None):
+    """One page as {"url", "depth", "text", "links", ...}; None if it's a 304"""
+    pacer.wait()
+    page = fetch_html(url, headers={"User-Agent": CRAWL_USER_AGENT, **(headers or {})}, timeout=CRAWL_TIMEOUT)
+    if page is None:
+        return None
+    extracted = extract_page(page["body"], page["charset"])
+    return {
+        "url": normalize_url(page["url"]) or url,
+        "depth": depth,
+        "text": extracted["text"],
+        "links": extracted["links"],
+        "content_hash": content_hash(extracted["text"]),
+        "etag": page["etag"],
+        "last_modified": page["last_modified"],
+    }
+
+
+def _try_fetch(url, depth, pacer):
+    # One broken link shouldn't sink the crawl
+    try:
+        return fetch_page(url, depth, pacer)
+    except Exception as e:
+        print(f"⚠️ Skipping {url}: {e}")
+        return None
+
+
+def crawl_site(start_url, etag=None, last_modified=None, max_pages=CRAWL_MAX_PAGES,
+               max_depth=CRAWL_MAX_DEPTH, concurrency=CRAWL_CONCURRENCY):
+    """Breadth-first crawl of the site behind `start_url`, staying on its host.
+
+    The home page is fetched first, conditionally when `etag`/`last_modified`
+    are given; None means it was not modified and nothing else was fetched.
+    Otherwise returns the home page's validators and the distinct pages found,
+    home page first. Pages are deduplicated by normalized URL and by text hash.
+    """
+    start_url = normalize_url(start_url)
+    if start_url is None:
+        raise CrawlError("Not an http(s) URL")
+    robots = load_robots(start_url)
+    if not robots.can_fetch(ROBOTS_AGENT, start_url):
+        raise CrawlError("robots.txt disallows crawling this site")
+    pacer = PacedFetcher(robots.crawl_delay(ROBOTS_AGENT))
+
+    conditional = {}
+    if etag:
+        conditional["If-None-Match"] = etag
+    if last_modified:
+        conditional["If-Modified-Since"] = last_modified
+    home = fetch_page(start_url, 0, pacer, conditional)
+    if home is None:
+        return None
+
+    seen_urls = {start_url, home["url"]}
+    seen_hashes = {home["content_hash"]}
+    pages = [home]
+    frontier = [home]
+    fetched = 1
+
+    workers = 1 if pacer.delay else max(1, concurrency)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for depth in range(1, max_depth + 1):
+            candidates = []
+            for page in frontier:
+                for href in page["links"]:
+                    url = normalize_url(href, page["url"])
+                    if url is None or url in seen_urls or not same_site(url, start_url):
+                        continue
+                    seen_urls.add(url)
+                    priority = link_priority(url)
+                    if priority is not None and robots.can_fetch(ROBOTS_AGENT, url):
+                        candidates.append((priority, url))
+            batch = [url for _, url in sorted(candidates)[: max_pages - fetched]]
+            if not batch:
+                break
+            fetched += len(batch)
+
+            frontier = []
+            for page in executor.map(lambda url: _try_fetch(url, depth, pacer), batch):
+                # Redirects and aliases (/, /index.html, ?ref=) land on pages we already have
+                if page is None or page["content_hash"] in seen_hashes or not same_site(page["url"], start_url):
+                    continue
+                seen_urls.add(page["url"])
+                seen_hashes.add(page["content_hash"])
+                pages.append(page)
+                frontier.append(page)
+
+    print(f"🕸️ Crawled {start_url}: {len(pages)} distinct page(s) from {fetched} fetch(es)")
+    return {
+        "url": home["url"],
+        "etag": home["etag"],
+        "last_modified": home["last_modified"],
+        "pages": [{key: page[key] for key in ("url", "depth", "text", "content_hash")} for page in pages],
+    }
+
@@ -0,0 +1,231 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from langchain_cohere import ChatCohere
+from psycopg2.extras import RealDictCursor, execute_values
+from src.db import get_conn
+from src.crawler import crawl_site, content_hash
+load_dotenv()
+
+# ---------------- WEBSITE ENRICHMENT CONFIG ----------------
+# Client websites are scraped and summarized here, offline, never on the request path
+ENRICH_BATCH_SIZE = int(os.getenv("ENRICH_BATCH_SIZE", 20))
+ENRICH_CONCURRENCY = int(os.getenv("ENRICH_CONCURRENCY", 4))
+ENRICH_POLL_INTERVAL = float(os.getenv("ENRICH_POLL_INTERVAL", 300))
+# Summaries are revalidated (conditional GET) this often; failed sites retry sooner
+ENRICH_REFRESH_INTERVAL = int(os.getenv("ENRICH_REFRESH_INTERVAL", 7 * 24 * 3600))
+ENRICH_RETRY_INTERVAL = int(os.getenv("ENRICH_RETRY_INTERVAL", 3600))
+# A claimed site not finished within this long (crashed worker) becomes due again
+ENRICH_LEASE = 900
+# llm, or extractive to summarize without an LLM call
+ENRICH_SUMMARIZER = os.getenv("ENRICH_SUMMARIZER", "llm")
+# Site text sent to the summarizer (at most ENRICH_PAGE_TEXT_CHARS from each crawled
+# page, home page first), and the summary that ends up in every prompt
+ENRICH_MAX_TEXT_CHARS = 12000
+ENRICH_PAGE_TEXT_CHARS = 3000
+ENRICH_SUMMARY_MAX_CHARS = 1000
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+SUMMARY_PROMPT = """
+Summarize this company/personal website for someone ghost-writing LinkedIn posts for its owner.
+In at most 120 words of plain text, cover what they offer, who they serve and anything distinctive
+(products, clients, results, values). No marketing fluff, no lists, no markdown.
+
+WEBSITE TEXT:
+{text}"""
+
+
+def normalize_website(website):
+    """Fetchable URL for a Websites value from the profile CSV, or None"""
+    website = (website or "").strip()
+    if not website or website.lower() == "nan":
+        return None
+    if not website.startswith(("http://", "https://")):
+        website = "https://" + website
+    return website
+
+
+# ---------------- SUMMARIZE ----------------
+def site_text(pages):
+    """Text the summary is written from: the start of each page, home page first"""
+    return "\n\n".join(page["text"][:ENRICH_PAGE_TEXT_CHARS] for page in pages)[:ENRICH_MAX_TEXT_CHARS]
+
+
+def extractive_summary(text, max_chars=ENRICH_SUMMARY_MAX_CHARS):
+    """Leading full sentences of the page, skipping menu-like fragments"""
+    picked, size = [], 0
+    for sentence in SENTENCE_RE.split(text):
+        if len(sentence.split()) < 6:
+            continue
+        if size + len(sentence) > max_chars:
+            break
+        picked.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(picked) or text[:max_chars]
+
+
+def summarize_text(text):
+    """Short description of the site for content prompts; falls back to extractive on LLM errors"""
+    text = text[:ENRICH_MAX_TEXT_CHARS]
+    if ENRICH_SUMMARIZER == "llm":
+        try:
+            response = ChatCohere(temperature=0).invoke(SUMMARY_PROMPT.format(text=text))
+            summary = " ".join(str(response.content).split())
+            if summary:
+                return summary[:ENRICH_SUMMARY_MAX_CHARS]
+        except Exception as e:
+            print(f"⚠️ LLM website summary failed, using extractive summary: {e}")
+    return extractive_summary(text)
+
+
+# ---------------- CLAIM / STORE ----------------
+def queue_new_websites():
+    """Add a pending row for every profile website not seen before; returns how many"""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+        INSERT INTO website_summaries (website)
+        SELECT DISTINCT website FROM user_details
+        WHERE website IS NOT NULL AND btrim(website) <> '' AND lower(btrim(website)) <> 'nan'
+        ON CONFLICT (website) DO NOTHING
+        """)
+        queued = cur.rowcount
+        conn.commit()
+        cur.close()
+    return queued
+
+
+def claim_due_websites(batch_size=ENRICH_BATCH_SIZE):
+    """Lease up to `batch_size` sites due for a (re)fetch; SKIP LOCKED keeps workers apart"""
+    with get_conn() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("""
+        UPDATE website_summaries
+        SET refresh_after = CURRENT_TIMESTAMP + make_interval(secs => %s), updated_at = CURRENT_TIMESTAMP
+        WHERE website IN (
+            SELECT website FROM website_summaries
+            WHERE refresh_after <= CURRENT_TIMESTAMP
+            ORDER BY refresh_after
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING website, url, summary, content_hash, etag, last_modified
+        """, (ENRICH_LEASE, batch_size))
+        rows = cur.fetchall()
+        conn.commit()
+        cur.close()
+    return rows
+
+
+def save_website(website, **fields):
+    """Record a fetch attempt and schedule the next refresh (sooner after a failure)"""
+    interval = ENRICH_RETRY_INTERVAL if fields.get("status") == "failed" else ENRICH_REFRESH_INTERVAL
+    assignments = ", ".join(f"{column} = %s" for column in fields)
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+        UPDATE website_summaries
+        SET {assignments}, refresh_after = CURRENT_TIMESTAMP + make_interval(secs => %s),
+            fetched_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+        WHERE website = %s
+        """, (*fields.values(), interval, website))
+        conn.commit()
+        cur.close()
+
+
+def save_pages(website, pages):
+    """Replace the stored page texts of a site with this crawl's"""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("DELETE FROM website_pages WHERE website = %s", (website,))
+            execute_values(cur, """
+            INSERT INTO website_pages (website, url, depth, text, content_hash) VALUES %s
+            """, [(website, page["url"], page["depth"], page["text"], page["content_hash"]) for page in pages])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+def enrich_website(row):
+    """Crawl, clean and summarize one site; returns the resulting status"""
+    website = row["website"]
+    url = row["url"] or normalize_website(website)
+    try:
+        if url is None:
+            raise ValueError("Not a website")
+        # Validators are only worth sending if we still have what they validate;
+        # they cover the home page, so an unchanged home page skips the whole crawl
+        has_summary = bool(row["summary"])
+        site = crawl_site(url, row["etag"] if has_summary else None, row["last_modified"] if has_summary else None)
+        if site is None:
+            save_website(website, status="not_modified", error=None)
+            return "not_modified"
+
+        pages = [page for page in site["pages"] if page["text"]]
+        if not pages:
+            raise ValueError("No text on site")
+        digest = content_hash("\n".join(page["content_hash"] for page in pages))
+        validators = {"url": site["url"], "etag": site["etag"], "last_modified": site["last_modified"]}
+        if has_summary and digest == row["content_hash"]:
+            # Server didn't do conditional GET, but the text is the same: skip the LLM
+            save_website(website, status="unchanged", error=None, **validators)
+            return "unchanged"
+
+        save_pages(website, pages)
+        save_website(
+            website, summary=summarize_text(site_text(pages)), content_hash=digest,
+            status="summarized", error=None, **validators
+        )
+        print(f"🌐 Summarized {url} from {len(pages)} page(s)")
+        return "summarized"
+    except Exception as e:
+        print(f"⚠️ Website enrichment failed for {website}: {e}")
+        save_website(website, status="failed", error=str(e)[:500])
+        return "failed"
+
+
+def run_enrichment_once(executor=None, batch_size=ENRICH_BATCH_SIZE):
+    """Queue new sites and process one due batch; returns {status: count}"""
+    queue_new_websites()
+    rows = claim_due_websites(batch_size)
+    if executor is None:
+        statuses = [enrich_website(row) for row in rows]
+    else:
+        statuses = list(executor.map(enrich_website, rows))
+    counts = {}
+    for status in statuses:
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def enrichment_loop(stop_event, concurrency=ENRICH_CONCURRENCY):
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        while not stop_event.is_set():
+            try:
+                counts = run_enrichment_once(executor)
+            except Exception as e:
+                print(f"⚠️ Enrichment error: {e}")
+                counts = {}
+            if counts:
+                print(f"🌐 Website enrichment: {counts}")
+            # Keep draining a backlog (first run, many new clients); otherwise wait
+            if sum(counts.values()) < ENRICH_BATCH_SIZE:
+                stop_event.wait(ENRICH_POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    # One-off backfill: python -m src.enrichment
+    with ThreadPoolExecutor(max_workers=max(1, ENRICH_CONCURRENCY)) as pool:
+        total = {}
+        while True:
+            counts = run_enrichment_once(pool)
+            for status, count in counts.items():
+                total[status] = total.get(status, 0) + count
+            if sum(counts.values()) < ENRICH_BATCH_SIZE:
+                break
+    print(f"🚀 Website enrichment done: {total}")
@@ -1,20 +1,10 @@
 from langchain_core.tools import tool
-import requests
-import json
+from src.image_providers import get_image_provider
 @tool
 def generate_images(topics):
   """Generate images based on post"""
+  provider = get_image_provider()
   images = []
   for i in range(len(topics)):
-    url = "https://subnp.com//api/free/generate"  
-    headers = {
-        "Content-Type": "application/json",
-    }
-    data = {
-        "prompt": topics[i],
-        "model": "turbo"
-    }
-
-    response = requests.post(url, headers=headers, json=data)
-    images.append(json.loads(response.content.decode().strip().split("\n")[-1][6:])['imageUrl'])
-    return images
\ No newline at end of file
+    images.append(provider.generate(topics[i]))
+  return images
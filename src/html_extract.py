@@ -0,0 +1,194 @@
+import os
+import re
+import socket
+import ipaddress
+from urllib.parse import urljoin, urlsplit
+import requests
+from lxml import etree
+from src.http_client import get_session
+
+# ---------------- HTML EXTRACTION CONFIG ----------------
+# Bytes read per page; the rest of a huge page is dropped, not buffered
+HTML_MAX_BYTES = int(os.getenv("HTML_MAX_BYTES", 2 * 1024 * 1024))
+HTML_CHUNK_BYTES = 64 * 1024
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+# Text kept per page; summaries only ever use the start of it
+HTML_MAX_TEXT_CHARS = int(os.getenv("HTML_MAX_TEXT_CHARS", 100000))
+HTML_MAX_LINKS = 500
+FETCH_MAX_REDIRECTS = 5
+# Client websites are user input: only public addresses are fetched unless this is
+# "true" (local benchmarks against 127.0.0.1)
+FETCH_ALLOW_PRIVATE_HOSTS = os.getenv("FETCH_ALLOW_PRIVATE_HOSTS", "false").lower() == "true"
+
+# Never visible, or the same on every page of a site
+BOILERPLATE_TAGS = (
+    "head", "title", "script", "style", "noscript", "template", "svg", "iframe", "canvas",
+    "nav", "aside", "form", "button", "select",
+)
+BOILERPLATE_ROLES = ("navigation", "banner", "contentinfo", "search", "menu", "menubar", "dialog")
+CHARSET_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+
+
+class HTMLFetchError(ValueError):
+    """The URL didn't give us an HTML page we can use"""
+
+
+class UnsafeURLError(HTMLFetchError):
+    """The URL's host is loopback, private, link-local (cloud metadata) or otherwise not public"""
+
+
+# ---------------- SAFE FETCH ----------------
+def check_public_url(url):
+    """Raise UnsafeURLError unless every address the URL's host resolves to is public"""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise UnsafeURLError(f"Not an http(s) URL: {url}")
+    if FETCH_ALLOW_PRIVATE_HOSTS:
+        return
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        infos = socket.getaddrinfo(parts.hostname, port, proto=socket.IPPROTO_TCP)
+    except ValueError:
+        raise UnsafeURLError(f"Bad port in {url}")
+    except socket.gaierror as e:
+        raise requests.ConnectionError(f"Can't resolve {parts.hostname}: {e}")
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%")[0])
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            raise UnsafeURLError(f"{parts.hostname} resolves to a non-public address ({address})")
+
+
+def guarded_get(url, max_redirects=FETCH_MAX_REDIRECTS, **kwargs):
+    """GET that checks the host before connecting, and again before following each redirect"""
+    session = get_session()
+    for _ in range(max_redirects + 1):
+        check_public_url(url)
+        response = session.get(url, allow_redirects=False, **kwargs)
+        if not response.is_redirect:
+            return response
+        url = urljoin(response.url, response.headers["Location"])
+        response.close()
+    raise requests.TooManyRedirects(f"More than {max_redirects} redirects")
+
+
+def response_charset(content_type):
+    match = CHARSET_RE.search(content_type or "")
+    return match.group(1) if match else None
+
+
+def read_capped(chunks, max_bytes=HTML_MAX_BYTES):
+    """Join byte chunks up to `max_bytes`; returns (body, truncated)"""
+    body, size = [], 0
+    for chunk in chunks:
+        if size + len(chunk) > max_bytes:
+            body.append(chunk[:max_bytes - size])
+            return b"".join(body), True
+        body.append(chunk)
+        size += len(chunk)
+    return b"".join(body), False
+
+
+def fetch_html(url, headers=None, timeout=10, max_bytes=HTML_MAX_BYTES):
+    """Streamed GET of an HTML page reading at most `max_bytes`; None means 304 Not Modified.
+
+    Non-HTML responses raise HTMLFetchError before their body is downloaded,
+    and non-public hosts (including redirect targets) raise UnsafeURLError.
+    """
+    with guarded_get(url, headers=headers, timeout=timeout, stream=True) as response:
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        content_type = response.headers.get("Content-Type", "")
+        if content_type and content_type.split(";")[0].strip().lower() not in HTML_CONTENT_TYPES:
+            raise HTMLFetchError(f"Not an HTML page ({content_type.split(';')[0]})")
+        body, truncated = read_capped(response.iter_content(HTML_CHUNK_BYTES), max_bytes)
+    if truncated:
+        print(f"✂️ {url} is larger than {max_bytes} bytes, using the first {max_bytes}")
+    return {
+        "url": response.url,
+        "body": body,
+        "charset": response_charset(content_type),
+        "truncated": truncated,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+
+
+class TextCollector:
+    """lxml parser target that keeps visible text and never builds a tree.
+
+    Boilerplate subtrees are skipped as they stream past; text inside
+    <main>/<article> is also collected separately and preferred when present.
+    Link targets are kept from everywhere, navigation included.
+    """
+
+    def __init__(self, max_chars=HTML_MAX_TEXT_CHARS):
+        self.max_chars = max_chars
+        self.description = ""
+        self.links = []
+        self._stack = []
+        self._skip = 0
+        self._main = 0
+        self._text, self._main_text = [], []
+        self._chars = self._main_chars = 0
+
+    def start(self, tag, attrib):
+        tag = tag.lower() if isinstance(tag, str) else ""
+        if tag == "meta" and attrib.get("name", "").lower() == "description":
+            self.description = attrib.get("content", "").strip()
+        elif tag == "a" and attrib.get("href") and len(self.links) < HTML_MAX_LINKS:
+            self.links.append(attrib["href"].strip())
+        skip = self._skip > 0 or tag in BOILERPLATE_TAGS or (
+            attrib.get("role") in BOILERPLATE_ROLES
+            or attrib.get("aria-hidden") == "true"
+            or "hidden" in attrib
+            # Site-wide header/footer; an article's own <header> holds its title
+            or (tag in ("header", "footer") and not self._main)
+        )
+        main = tag in ("main", "article") or attrib.get("role") == "main"
+        self._stack.append((skip, main))
+        self._skip += skip
+        self._main += main
+
+    def end(self, tag):
+        if self._stack:
+            skip, main = self._stack.pop()
+            self._skip -= skip
+            self._main -= main
+
+    def data(self, text):
+        if self._skip:
+            return
+        if self._chars < self.max_chars:
+            self._text.append(text)
+            self._chars += len(text)
+        if self._main and self._main_chars < self.max_chars:
+            self._main_text.append(text)
+            self._main_chars += len(text)
+
+    def close(self):
+        text = " ".join(" ".join(self._main_text or self._text).split())[:self.max_chars]
+        if self.description and self.description not in text:
+            text = f"{self.description} {text}" if text else self.description
+        return text
+
+
+def extract_page(body, charset=None, max_chars=HTML_MAX_TEXT_CHARS):
+    """{"text", "links"} of a page in one parse; links are raw href values"""
+    if not body or not body.strip():
+        raise HTMLFetchError("Empty page")
+    collector = TextCollector(max_chars)
+    try:
+        parser = etree.HTMLParser(encoding=charset, target=collector, remove_comments=True, remove_pis=True)
+    except LookupError:
+        # Bogus charset in the header; let libxml2 sniff it
+        parser = etree.HTMLParser(target=collector, remove_comments=True, remove_pis=True)
+    text = etree.fromstring(body, parser)
+    return {"text": text, "links": collector.links}
+
+
+def extract_text(body, charset=None, max_chars=HTML_MAX_TEXT_CHARS):
+    """Readable text of a page: meta description plus main content, whitespace collapsed"""
+    return extract_page(body, charset, max_chars)["text"]
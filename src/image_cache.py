@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from src.db import get_conn
+
+# ---------------- IMAGE CACHE CONFIG ----------------
+# "postgres", "disk" or "memory" (memory-only does not survive restarts)
+IMAGE_CACHE_BACKEND = os.getenv("IMAGE_CACHE_BACKEND", "postgres").lower()
+IMAGE_CACHE_TTL = int(os.getenv("IMAGE_CACHE_TTL", 7 * 24 * 3600))
+IMAGE_CACHE_MAX_ENTRIES = int(os.getenv("IMAGE_CACHE_MAX_ENTRIES", 5000))
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "/tmp/linkedin-agent-image-cache")
+
+
+def cache_key(prompt, model):
+    """Content address for a generation request: same prompt + model -> same key"""
+    normalized = " ".join(str(prompt).lower().split())
+    return hashlib.sha256(f"{model}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+class DiskBackend:
+    """One JSON file per key; file mtime doubles as last-access time for LRU"""
+
+    def __init__(self, directory=IMAGE_CACHE_DIR, max_entries=IMAGE_CACHE_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if entry["expires_at"] < time.time():
+            self.delete(key)
+            return None
+        os.utime(path)
+        return entry
+
+    def set(self, key, entry):
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        """Drop the least recently used files beyond max_entries; returns how many"""
+        entries = [e for e in os.scandir(self.directory) if e.name.endswith(".json")]
+        if len(entries) <= self.max_entries:
+            return 0
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        stale = entries[:len(entries) - self.max_entries]
+        for e in stale:
+            self.delete(e.name[:-5])
+        return len(stale)
+
+
+class PostgresBackend:
+    """image_cache table (see src/migrations.py); last_hit_at drives LRU eviction"""
+
+    def __init__(self, max_entries=IMAGE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+
+    def get(self, key):
+        with get_conn() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+            UPDATE image_cache SET last_hit_at = CURRENT_TIMESTAMP
+            WHERE key = %s AND expires_at > CURRENT_TIMESTAMP
+            RETURNING prompt, model, image_url, EXTRACT(EPOCH FROM expires_at)
+            """, (key,))
+            row = cur.fetchone()
+            conn.commit()
+            cur.close()
+        if not row:
+            return None
+        return {"prompt": row[0], "model": row[1], "image_url": row[2], "expires_at": float(row[3])}
+
+    def set(self, key, entry):
+        with get_conn() as conn:
+            cur = conn.cursor()
+            cur.execute("""
+            INSERT INTO image_cache (key, prompt, model, image_url, expires_at)
+            VALUES (%s, %s, %s, %s, TO_TIMESTAMP(%s))
+            ON CONFLICT (key) DO UPDATE
+            SET image_url = EXCLUDED.image_url, expires_at = EXCLUDED.expires_at,
+                last_hit_at = CURRENT_TIMESTAMP
+            """, (key, entry["prompt"], entry["model"], entry["image_url"], entry["expires_at"]))
+            conn.commit()
+            cur.close()
+
+    def delete(self, key):
+        with get_conn() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM image_cache WHERE key = %s", (key,))
+            conn.commit()
+            cur.close()
+
+    def evict(self):
+        with get_conn() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM image_cache WHERE expires_at <= CURRENT_TIMESTAMP")
+            expired = cur.rowcount
+            cur.execute("""
+            DELETE FROM image_cache WHERE key IN (
+                SELECT key FROM image_cache ORDER BY last_hit_at DESC OFFSET %s
+            )
+            """, (self.max_entries,))
+            evicted = expired + cur.rowcount
+            conn.commit()
+            cur.close()
+        return evicted
+
+
+class ImageCache:
+    """Prompt-hash -> image URL cache: in-process LRU in front of a persistent backend"""
+
+    # Run backend eviction after this many writes rather than on every one
+    EVICT_EVERY = 100
+
+    def __init__(self, backend=None, ttl=IMAGE_CACHE_TTL, max_entries=IMAGE_CACHE_MAX_ENTRIES):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats = {"hits": 0, "backend_hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+    def _bump(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get(self, prompt, model):
+        """Cached image URL for this prompt/model, or None"""
+        key = cache_key(prompt, model)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["expires_at"] > time.time():
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry["image_url"]
+            if entry:
+                del self._entries[key]
+
+        if self.backend is not None:
+            try:
+                entry = self.backend.get(key)
+            except Exception as e:
+                print(f"⚠️ Image cache read failed: {e}")
+                self._bump("errors")
+                entry = None
+            if entry:
+                self._remember(key, entry)
+                self._bump("hits")
+                self._bump("backend_hits")
+                return entry["image_url"]
+
+        self._bump("misses")
+        return None
+
+    def set(self, prompt, model, image_url):
+        key = cache_key(prompt, model)
+        entry = {"prompt": str(prompt), "model": model, "image_url": image_url, "expires_at": time.time() + self.ttl}
+        self._remember(key, entry)
+        self._bump("stores")
+
+        if self.backend is not None:
+            try:
+                self.backend.set(key, entry)
+                with self._lock:
+                    self._writes += 1
+                    due = self._writes % self.EVICT_EVERY == 0
+                if due:
+                    self._bump("evictions", self.backend.evict())
+            except Exception as e:
+                print(f"⚠️ Image cache write failed: {e}")
+                self._bump("errors")
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+                "entries_in_memory": len(self._entries),
+                "backend": type(self.backend).__name__ if self.backend else "memory",
+            }
+
+
+def make_backend(name=IMAGE_CACHE_BACKEND):
+    if name == "postgres":
+        return PostgresBackend()
+    if name == "disk":
+        return DiskBackend()
+    return None
+
+
+image_cache = ImageCache(backend=make_backend())
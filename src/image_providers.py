@@ -0,0 +1,292 @@
+import os
+import json
+import codecs
+import time
+import uuid
+import random
+import asyncio
+import threading
+from src.http_client import get_async_client, get_session
+
+# ---------------- IMAGE PROVIDER CONFIG ----------------
+# Which registered provider generates images: subnp (default) or stub for offline runs
+IMAGE_PROVIDER = os.getenv("IMAGE_PROVIDER", "subnp")
+IMAGE_API_URL = os.getenv("IMAGE_API_URL", "https://subnp.com/api/free/generate")
+IMAGE_MODEL = os.getenv("IMAGE_MODEL", "magic")
+IMAGE_TIMEOUT = 30
+
+IMAGE_STUB_LATENCY = float(os.getenv("IMAGE_STUB_LATENCY", 1.0))
+IMAGE_STUB_JITTER = float(os.getenv("IMAGE_STUB_JITTER", 0.5))
+IMAGE_STUB_FAILURE_RATE = float(os.getenv("IMAGE_STUB_FAILURE_RATE", 0.0))
+
+
+class ImageProviderError(Exception):
+    """The provider answered, but without a usable image"""
+
+
+# An event this large means we're not talking to an image API
+MAX_EVENT_BYTES = 256 * 1024
+SSE_FIELDS = ("data:", "event:", "id:", "retry:", ":")
+
+
+class EventStreamParser:
+    """Incremental parser for `data: {...}` event streams (or a single plain JSON body).
+
+    feed() returns the events completed by each chunk, so callers can act on
+    the final event without waiting for the connection to close. A data line
+    that is already complete JSON is emitted right away instead of waiting
+    for the blank line that terminates it. Anything that can't be an event
+    stream raises ImageProviderError as soon as it is seen.
+    """
+
+    def __init__(self, max_event_bytes=MAX_EVENT_BYTES):
+        self.max_event_bytes = max_event_bytes
+        self._buffer = ""
+        self._data_lines = []
+        self._plain_json = None
+        # Chunks can end mid-character
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, chunk):
+        if isinstance(chunk, bytes):
+            chunk = self._decoder.decode(chunk)
+        self._buffer += chunk
+        if self._plain_json is None and self._buffer.strip():
+            self._plain_json = self._buffer.lstrip().startswith("{")
+        if self._plain_json:
+            self._check_size(self._buffer)
+            return []
+
+        events = []
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            events.extend(self._line(line.rstrip("\r")))
+        self._check_size(self._buffer)
+        # The final event often isn't newline-terminated; don't wait for the close
+        if self._buffer.startswith("data:") and self._buffer.rstrip().endswith("}"):
+            event = self._try_json(self._data_lines + [self._buffer[5:].lstrip()])
+            if event is not None:
+                self._buffer, self._data_lines = "", []
+                events.append(event)
+        return events
+
+    def close(self):
+        """Events still buffered once the body has ended"""
+        self._buffer += self._decoder.decode(b"", final=True)
+        if self._plain_json:
+            body, self._buffer = self._buffer, ""
+            try:
+                return [json.loads(body)]
+            except json.JSONDecodeError:
+                raise ImageProviderError(f"Malformed JSON image response: {body[:200]}")
+        events = self._line(self._buffer.rstrip("\r")) if self._buffer else []
+        self._buffer = ""
+        return events + self._line("")
+
+    def _check_size(self, pending):
+        if len(pending) + sum(len(line) for line in self._data_lines) > self.max_event_bytes:
+            raise ImageProviderError(f"Image response event exceeds {self.max_event_bytes} bytes")
+
+    def _line(self, line):
+        if not line.strip():
+            return self._dispatch()
+        if line.startswith("data:"):
+            self._data_lines.append(line[5:].lstrip())
+            event = self._try_json(self._data_lines)
+            if event is not None:
+                self._data_lines = []
+                return [event]
+            return []
+        if not line.startswith(SSE_FIELDS):
+            raise ImageProviderError(f"Malformed event stream line: {line[:200]}")
+        return []
+
+    def _dispatch(self):
+        if not self._data_lines:
+            return []
+        data, self._data_lines = "\n".join(self._data_lines), []
+        try:
+            return [json.loads(data)]
+        except json.JSONDecodeError:
+            raise ImageProviderError(f"Malformed event in image response: {data[:200]}")
+
+    @staticmethod
+    def _try_json(data_lines):
+        try:
+            event = json.loads("\n".join(data_lines))
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(event, dict):
+            raise ImageProviderError(f"Unexpected event in image response: {str(event)[:200]}")
+        return event
+
+
+def parse_event_stream(body):
+    """All events of a complete response body"""
+    parser = EventStreamParser()
+    return parser.feed(body) + parser.close()
+
+
+def handle_event(event, on_progress=None):
+    """imageUrl if this is the final event, None for progress; error events raise"""
+    if event.get("status") == "error":
+        raise ImageProviderError(event.get("message") or "Image provider reported an error")
+    if event.get("imageUrl"):
+        return event["imageUrl"]
+    if on_progress:
+        on_progress(event)
+    return None
+
+
+def image_url_from_events(events, on_progress=None):
+    """imageUrl of the first final event; error events become ImageProviderError"""
+    for event in events:
+        image_url = handle_event(event, on_progress)
+        if image_url:
+            return image_url
+    raise ImageProviderError(f"No imageUrl in image response: {events[-1] if events else 'empty body'}")
+
+
+class ImageProvider:
+    """Turns one prompt into one image URL; raise on failure.
+
+    `on_progress(event)` is called with each intermediate event the backend
+    reports before the image is ready.
+    """
+
+    name = "base"
+
+    def __init__(self, model):
+        # Also part of the image cache key, so providers never share cached images
+        self.model = model
+
+    def generate(self, prompt, on_progress=None):
+        raise NotImplementedError
+
+    async def agenerate(self, prompt, on_progress=None):
+        if on_progress:
+            # generate() runs on a worker thread; hop back to the loop for the callback
+            loop = asyncio.get_running_loop()
+            callback = on_progress
+            on_progress = lambda event: loop.call_soon_threadsafe(callback, event)
+        return await asyncio.to_thread(self.generate, prompt, on_progress)
+
+
+class SubnpProvider(ImageProvider):
+    """subnp.com free API (or anything speaking its request/event-stream shape).
+
+    The response is consumed as it streams in; the call returns as soon as
+    the event carrying imageUrl arrives.
+    """
+
+    name = "subnp"
+
+    def __init__(self, url=IMAGE_API_URL, model=IMAGE_MODEL, timeout=IMAGE_TIMEOUT):
+        super().__init__(model)
+        self.url = url
+        self.timeout = timeout
+
+    def payload(self, prompt):
+        return {"prompt": str(prompt).strip(), "model": self.model}
+
+    def generate(self, prompt, on_progress=None):
+        # Shared session keeps the TLS connection to the provider alive between prompts
+        with get_session().post(self.url, json=self.payload(prompt), timeout=self.timeout, stream=True) as response:
+            if response.status_code != 200:
+                raise ImageProviderError(f"Image API error: {response.status_code} - {response.text[:200]}")
+            parser = EventStreamParser()
+            for chunk in response.iter_content(chunk_size=None):
+                for event in parser.feed(chunk):
+                    image_url = handle_event(event, on_progress)
+                    if image_url:
+                        return image_url
+            return image_url_from_events(parser.close(), on_progress)
+
+    async def agenerate(self, prompt, on_progress=None):
+        async with get_async_client().stream("POST", self.url, json=self.payload(prompt), timeout=self.timeout) as response:
+            if response.status_code != 200:
+                body = (await response.aread()).decode("utf-8", errors="replace")
+                raise ImageProviderError(f"Image API error: {response.status_code} - {body[:200]}")
+            parser = EventStreamParser()
+            async for chunk in response.aiter_bytes():
+                for event in parser.feed(chunk):
+                    image_url = handle_event(event, on_progress)
+                    if image_url:
+                        return image_url
+            return image_url_from_events(parser.close(), on_progress)
+
+
+class StubProvider(ImageProvider):
+    """In-process stand-in with configurable latency and failure rate; no network"""
+
+    name = "stub"
+
+    def __init__(self, latency=IMAGE_STUB_LATENCY, jitter=IMAGE_STUB_JITTER, failure_rate=IMAGE_STUB_FAILURE_RATE, model="stub"):
+        super().__init__(model)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+
+    def _result(self):
+        if random.random() < self.failure_rate:
+            raise ImageProviderError("Stub image provider failure")
+        return f"https://stub.local/images/{uuid.uuid4().hex}.jpg"
+
+    def _delay(self):
+        return self.latency + random.uniform(0, self.jitter)
+
+    def generate(self, prompt, on_progress=None):
+        delay = self._delay()
+        time.sleep(delay / 2)
+        if on_progress:
+            on_progress({"status": "processing", "message": "Generating"})
+        time.sleep(delay / 2)
+        return self._result()
+
+    async def agenerate(self, prompt, on_progress=None):
+        delay = self._delay()
+        await asyncio.sleep(delay / 2)
+        if on_progress:
+            on_progress({"status": "processing", "message": "Generating"})
+        await asyncio.sleep(delay / 2)
+        return self._result()
+
+
+# ---------------- REGISTRY ----------------
+IMAGE_PROVIDERS = {}
+_active_provider = None
+_provider_lock = threading.Lock()
+
+
+def register_image_provider(name, factory):
+    """Make a provider selectable with IMAGE_PROVIDER=<name>; `factory()` builds it"""
+    IMAGE_PROVIDERS[name] = factory
+
+
+register_image_provider("subnp", SubnpProvider)
+register_image_provider("stub", StubProvider)
+
+
+def get_image_provider():
+    """Provider all image generation goes through, built once from IMAGE_PROVIDER"""
+    global _active_provider
+    with _provider_lock:
+        if _active_provider is None:
+            factory = IMAGE_PROVIDERS.get(IMAGE_PROVIDER)
+            if factory is None:
+                raise ImageProviderError(f"Unknown IMAGE_PROVIDER {IMAGE_PROVIDER!r}. Use one of: {', '.join(IMAGE_PROVIDERS)}")
+            _active_provider = factory()
+        return _active_provider
+
+
+def use_image_provider(provider):
+    """Swap the active provider (a registered name or an instance); returns it"""
+    global _active_provider
+    if isinstance(provider, str):
+        factory = IMAGE_PROVIDERS.get(provider)
+        if factory is None:
+            raise ImageProviderError(f"Unknown image provider {provider!r}")
+        provider = factory()
+    with _provider_lock:
+        _active_provider = provider
+    return provider
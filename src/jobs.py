@@ -0,0 +1,146 @@
+import os
+import random
+from psycopg2.extras import Json, RealDictCursor
+from src.db import get_conn
+
+# ---------------- JOB QUEUE CONFIG ----------------
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE", 10))
+JOB_BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX", 600))
+# A running job whose worker hasn't finished within this many seconds is recovered
+JOB_LOCK_TIMEOUT = int(os.getenv("JOB_LOCK_TIMEOUT", 900))
+
+JOB_KINDS = ("makepost", "postcontent")
+# Kinds a lost worker can simply run again; a lost postcontent job may already have posted
+RETRYABLE_JOB_KINDS = ["makepost"]
+
+# Payload keys that must not outlive the job (tokens are only needed while it runs)
+SECRET_PAYLOAD_KEYS = ["access_token"]
+
+
+class PermanentJobError(Exception):
+    """Retrying could do harm (e.g. a LinkedIn post that may already be published): fail the job now"""
+
+
+def backoff_seconds(attempts):
+    """Exponential backoff with jitter: base * 2^(attempts-1), capped"""
+    delay = min(JOB_BACKOFF_MAX, JOB_BACKOFF_BASE * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def enqueue_job(kind, payload, max_attempts=JOB_MAX_ATTEMPTS):
+    """Queue a job; returns its id"""
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+        INSERT INTO jobs (kind, payload, max_attempts)
+        VALUES (%s, %s, %s)
+        RETURNING id
+        """, (kind, Json(payload), max_attempts))
+        job_id = cur.fetchone()[0]
+        conn.commit()
+        cur.close()
+    return job_id
+
+
+def get_job(job_id):
+    """Job status row (payload excluded), or None"""
+    with get_conn() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("""
+        SELECT id, kind, status, attempts, max_attempts, result, error,
+               run_after, created_at, updated_at
+        FROM jobs WHERE id = %s
+        """, (job_id,))
+        job = cur.fetchone()
+        cur.close()
+    return job
+
+
+def claim_job():
+    """Atomically take the next due job; SKIP LOCKED lets workers dequeue in parallel"""
+    with get_conn() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("""
+        UPDATE jobs
+        SET status = 'running', attempts = attempts + 1,
+            locked_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+        WHERE id = (
+            SELECT id FROM jobs
+            WHERE status = 'queued' AND run_after <= CURRENT_TIMESTAMP
+            ORDER BY run_after, id
+            FOR UPDATE SKIP LOCKED
+            LIMIT 1
+        )
+        RETURNING id, kind, payload, attempts, max_attempts
+        """)
+        job = cur.fetchone()
+        conn.commit()
+        cur.close()
+    return job
+
+
+def complete_job(job_id, result):
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+        UPDATE jobs
+        SET status = 'succeeded', result = %s, error = NULL, locked_at = NULL,
+            payload = payload - %s::text[], updated_at = CURRENT_TIMESTAMP
+        WHERE id = %s
+        """, (Json(result), SECRET_PAYLOAD_KEYS, job_id))
+        conn.commit()
+        cur.close()
+
+
+def fail_job(job_id, error, attempts, max_attempts, retry=True):
+    """Requeue with backoff, or mark failed once attempts are used up (or retry is False)"""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        if retry and attempts < max_attempts:
+            cur.execute("""
+            UPDATE jobs
+            SET status = 'queued', error = %s, locked_at = NULL,
+                run_after = CURRENT_TIMESTAMP + make_interval(secs => %s),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+            """, (error, backoff_seconds(attempts), job_id))
+        else:
+            cur.execute("""
+            UPDATE jobs
+            SET status = 'failed', error = %s, locked_at = NULL,
+                payload = payload - %s::text[], updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+            """, (error, SECRET_PAYLOAD_KEYS, job_id))
+        conn.commit()
+        cur.close()
+
+
+def requeue_stale_jobs(lock_timeout=JOB_LOCK_TIMEOUT):
+    """Recover jobs abandoned by a crashed worker; returns how many.
+
+    Retryable kinds go back in the queue until attempts are used up (a job that
+    kills its worker must not loop forever). Others fail, since running them
+    again could repeat a side effect such as a LinkedIn post.
+    """
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+        WITH stale AS (
+            SELECT id, kind = ANY(%s) AND attempts < max_attempts AS requeue FROM jobs
+            WHERE status = 'running'
+              AND locked_at < CURRENT_TIMESTAMP - make_interval(secs => %s)
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE jobs
+        SET status = CASE WHEN stale.requeue THEN 'queued' ELSE 'failed' END,
+            payload = CASE WHEN stale.requeue THEN payload ELSE payload - %s::text[] END,
+            error = 'worker lost', locked_at = NULL, updated_at = CURRENT_TIMESTAMP
+        FROM stale WHERE jobs.id = stale.id
+        """, (RETRYABLE_JOB_KINDS, lock_timeout, SECRET_PAYLOAD_KEYS))
+        count = cur.rowcount
+        conn.commit()
+        cur.close()
+    return count
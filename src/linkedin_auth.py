@@ -0,0 +1,134 @@
+import os
+import time
+import hmac
+import hashlib
+import threading
+from src.db import get_conn
+from src.run_agent import get_linkedin_urn
+from src.token_store import get_access_token, token_cache
+
+# ---------------- LINKEDIN URN CACHE CONFIG ----------------
+# Used when the token's expiry is unknown (tokens sent straight to /postcontent)
+LINKEDIN_URN_CACHE_TTL = int(os.getenv("LINKEDIN_URN_CACHE_TTL", 3600))
+LINKEDIN_URN_CACHE_MAX_ENTRIES = int(os.getenv("LINKEDIN_URN_CACHE_MAX_ENTRIES", 10000))
+
+
+def token_hash(access_token):
+    """Never keep raw tokens as cache keys"""
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+
+class UrnCache:
+    """token-hash -> member URN, each entry living until its token expires"""
+
+    def __init__(self, default_ttl=LINKEDIN_URN_CACHE_TTL, max_entries=LINKEDIN_URN_CACHE_MAX_ENTRIES):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "db_hits": 0, "remote_lookups": 0, "remote_failures": 0}
+
+    def get(self, access_token):
+        key = token_hash(access_token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[key]
+                return None
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def set(self, access_token, urn, expires_in=None):
+        ttl = expires_in if expires_in is not None else self.default_ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                now = time.time()
+                self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+                if len(self._entries) >= self.max_entries:
+                    # Still full of live entries: drop the ones expiring soonest
+                    for k in sorted(self._entries, key=lambda k: self._entries[k][1])[:self.max_entries // 10 or 1]:
+                        del self._entries[k]
+            self._entries[token_hash(access_token)] = (urn, time.time() + ttl)
+
+    def record(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["db_hits"] + self._stats["remote_lookups"]
+            saved = self._stats["hits"] + self._stats["db_hits"]
+            return {
+                **self._stats,
+                "hit_rate": round(saved / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+urn_cache = UrnCache()
+
+
+# ---------------- STORED URNS ----------------
+def save_linkedin_urn(user_id, linkedin_urn):
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("UPDATE users SET linkedin_urn = %s WHERE id = %s", (linkedin_urn, user_id))
+        conn.commit()
+        cur.close()
+
+
+def load_linkedin_urn(user_id):
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT linkedin_urn FROM users WHERE id = %s", (user_id,))
+        row = cur.fetchone()
+        cur.close()
+    return row[0] if row else None
+
+
+def stored_token_matches(access_token, user_id):
+    """True if `access_token` is the token stored for this user (so their stored URN applies)"""
+    try:
+        stored = get_access_token(user_id)
+    except Exception as e:
+        print(f"⚠️ Stored LinkedIn token lookup failed: {e}")
+        return False
+    return bool(stored) and hmac.compare_digest(stored, access_token)
+
+
+def resolve_linkedin_urn(access_token, user_id=None):
+    """Member URN for a token: memory cache, then the user's stored URN, then /v2/userinfo.
+
+    The stored URN is only used when the token is the one stored for that
+    user; any other token is resolved (and cached) as its own member. A stored
+    token's URN is cached for as long as the token lives, others for the default TTL.
+    """
+    linkedin_urn = urn_cache.get(access_token)
+    if linkedin_urn:
+        return linkedin_urn
+
+    expires_in = None
+    if user_id is not None and stored_token_matches(access_token, user_id):
+        # stored_token_matches just read the token through token_cache
+        expires_in = token_cache.expires_in(user_id)
+        try:
+            linkedin_urn = load_linkedin_urn(user_id)
+        except Exception as e:
+            print(f"⚠️ Stored LinkedIn URN lookup failed: {e}")
+        if linkedin_urn:
+            urn_cache.record("db_hits")
+            urn_cache.set(access_token, linkedin_urn, expires_in)
+            return linkedin_urn
+
+    urn_cache.record("remote_lookups")
+    try:
+        linkedin_urn = get_linkedin_urn(access_token)
+    except Exception:
+        urn_cache.record("remote_failures")
+        raise
+    urn_cache.set(access_token, linkedin_urn, expires_in)
+    return linkedin_urn
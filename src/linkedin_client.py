@@ -0,0 +1,299 @@
+import os
+import time
+import random
+import hashlib
+import threading
+from email.utils import parsedate_to_datetime
+import requests
+from src.http_client import get_session
+
+# ---------------- LINKEDIN CLIENT CONFIG ----------------
+# Requests/second and burst size across the whole app, and per member token
+LINKEDIN_APP_RATE = float(os.getenv("LINKEDIN_APP_RATE", 20))
+LINKEDIN_APP_BURST = int(os.getenv("LINKEDIN_APP_BURST", 40))
+LINKEDIN_MEMBER_RATE = float(os.getenv("LINKEDIN_MEMBER_RATE", 3))
+LINKEDIN_MEMBER_BURST = int(os.getenv("LINKEDIN_MEMBER_BURST", 15))
+# Callers queue for a rate-limit slot at most this long before getting LinkedInUnavailable
+LINKEDIN_MAX_WAIT = float(os.getenv("LINKEDIN_MAX_WAIT", 20))
+LINKEDIN_MAX_RETRIES = int(os.getenv("LINKEDIN_MAX_RETRIES", 3))
+LINKEDIN_BACKOFF_BASE = float(os.getenv("LINKEDIN_BACKOFF_BASE", 0.5))
+LINKEDIN_BACKOFF_MAX = float(os.getenv("LINKEDIN_BACKOFF_MAX", 30))
+# Consecutive 5xx/network failures that open the breaker, and how long it stays open
+LINKEDIN_BREAKER_THRESHOLD = int(os.getenv("LINKEDIN_BREAKER_THRESHOLD", 5))
+LINKEDIN_BREAKER_COOLDOWN = float(os.getenv("LINKEDIN_BREAKER_COOLDOWN", 30))
+LINKEDIN_TIMEOUT = 30
+LINKEDIN_MEMBER_BUCKETS_MAX = 10000
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Safe to retry even for calls that create something: the request was not processed
+REJECTED_STATUS = {429, 503}
+
+
+class LinkedInAPIError(Exception):
+    """LinkedIn answered with an error; carries the status code to surface to the caller"""
+
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class LinkedInUnavailable(LinkedInAPIError):
+    """We are throttled or the breaker is open; try again after `retry_after` seconds"""
+
+    def __init__(self, detail, retry_after):
+        super().__init__(503, detail)
+        self.retry_after = retry_after
+
+
+def member_key(access_token):
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+
+def parse_retry_after(value):
+    """Retry-After as seconds, from either delta-seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Classic token bucket; acquire() blocks until a token is free or max_wait is exceeded"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, max_wait=LINKEDIN_MAX_WAIT):
+        """Take one token; returns seconds waited, or raises LinkedInUnavailable"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+            if wait > max_wait:
+                raise LinkedInUnavailable("LinkedIn rate limit reached, try again later", retry_after=wait)
+            # Reserve now so concurrent callers queue up behind us instead of racing
+            self._tokens -= 1
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        """Drain the bucket so nobody sends for `seconds` (after a 429 from LinkedIn)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+    def idle(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens >= self.burst
+
+
+class CircuitBreaker:
+    """Closed -> open after `threshold` straight failures -> half-open probe after `cooldown`"""
+
+    def __init__(self, threshold=LINKEDIN_BREAKER_THRESHOLD, cooldown=LINKEDIN_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Raise LinkedInUnavailable while open; lets one probe through once the cooldown is over.
+
+        Returns True for the caller that is the probe: it must end in
+        record_success, record_failure or release, whatever happens.
+        """
+        with self._lock:
+            if self.state == "closed":
+                return False
+            remaining = self._opened_at + self.cooldown - time.monotonic()
+            if remaining > 0 or self._probing:
+                raise LinkedInUnavailable("LinkedIn API is failing, requests paused", retry_after=max(remaining, 1.0))
+            self.state = "half_open"
+            self._probing = True
+            return True
+
+    def release(self):
+        """The probe got no verdict (rejected by a rate limit, unexpected error): let the next caller probe"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == "half_open" or self._failures >= self.threshold:
+                if self.state != "open":
+                    print(f"🔌 LinkedIn circuit opened after {self._failures} failure(s)")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+class LinkedInClient:
+    """Single path for every LinkedIn call: rate limits, retries with backoff, circuit breaker"""
+
+    def __init__(self):
+        self.app_bucket = TokenBucket(LINKEDIN_APP_RATE, LINKEDIN_APP_BURST)
+        self.breaker = CircuitBreaker()
+        self._member_buckets = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0, "throttled": 0, "throttle_wait_seconds": 0.0, "rate_limited": 0,
+            "retried": 0, "server_errors": 0, "network_errors": 0, "rejected": 0, "gave_up": 0,
+        }
+
+    def record(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "throttle_wait_seconds": round(self._stats["throttle_wait_seconds"], 3),
+                "circuit_state": self.breaker.state,
+                "member_buckets": len(self._member_buckets),
+            }
+
+    def member_bucket(self, access_token):
+        key = member_key(access_token)
+        with self._lock:
+            bucket = self._member_buckets.get(key)
+            if bucket is None:
+                if len(self._member_buckets) >= LINKEDIN_MEMBER_BUCKETS_MAX:
+                    # Full buckets carry no state worth keeping
+                    self._member_buckets = {k: b for k, b in self._member_buckets.items() if not b.idle()}
+                bucket = self._member_buckets[key] = TokenBucket(LINKEDIN_MEMBER_RATE, LINKEDIN_MEMBER_BURST)
+            return bucket
+
+    def backoff(self, attempt, response=None):
+        """Retry-After when LinkedIn sends one, else exponential backoff with full jitter"""
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+        if retry_after is not None:
+            return retry_after + random.uniform(0, LINKEDIN_BACKOFF_BASE)
+        return random.uniform(0, min(LINKEDIN_BACKOFF_MAX, LINKEDIN_BACKOFF_BASE * (2 ** attempt)))
+
+    def acquire(self, access_token=None):
+        """Wait for both the member's and the app's rate-limit slot, and for a closed breaker.
+
+        Returns True if this request is the breaker's half-open probe.
+        """
+        probe = False
+        try:
+            probe = self.breaker.allow()
+            waited = self.member_bucket(access_token).acquire() if access_token else 0.0
+            waited += self.app_bucket.acquire()
+        except LinkedInUnavailable:
+            if probe:
+                self.breaker.release()
+            self.record("rejected")
+            raise
+        if waited:
+            self.record("throttled")
+            self.record("throttle_wait_seconds", waited)
+        return probe
+
+    def observe(self, response, access_token=None):
+        """Feed a response into the breaker and the buckets; returns True if it is worth retrying"""
+        status = response.status_code
+        if status == 429:
+            self.record("rate_limited")
+            # LinkedIn is up, just throttling us; the buckets handle that, not the breaker
+            self.breaker.record_success()
+            pause = parse_retry_after(response.headers.get("Retry-After"))
+            if pause:
+                (self.member_bucket(access_token) if access_token else self.app_bucket).pause(pause)
+        elif status >= 500:
+            self.record("server_errors")
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return status in RETRYABLE_STATUS
+
+    def request(self, method, url, access_token=None, idempotent=True, max_retries=LINKEDIN_MAX_RETRIES, **kwargs):
+        """Send a request through the limiter; returns the final response like requests does.
+
+        Non-idempotent calls (creating a post) are only retried when LinkedIn
+        clearly rejected them (429/503) or the connection never opened.
+        """
+        kwargs.setdefault("timeout", LINKEDIN_TIMEOUT)
+        if access_token:
+            kwargs["headers"] = {"Authorization": f"Bearer {access_token}", **kwargs.get("headers", {})}
+
+        attempt = 0
+        while True:
+            probe = self.acquire(access_token)
+            self.record("requests")
+            try:
+                response = get_session().request(method, url, **kwargs)
+            except requests.RequestException as e:
+                self.record("network_errors")
+                self.breaker.record_failure()
+                # A connect timeout means nothing was sent; anything later may have landed
+                retryable = idempotent or isinstance(e, requests.ConnectTimeout)
+                if attempt >= max_retries or not retryable:
+                    self.record("gave_up")
+                    raise
+                delay = self.backoff(attempt)
+            except BaseException:
+                # Not a LinkedIn failure (bad arguments, interrupted): don't leave the probe hanging
+                if probe:
+                    self.breaker.release()
+                raise
+            else:
+                retryable = self.observe(response, access_token)
+                if idempotent is False and response.status_code not in REJECTED_STATUS:
+                    retryable = False
+                if not retryable:
+                    return response
+                delay = self.backoff(attempt, response)
+                # Long Retry-After: hand the response back so the caller can reschedule
+                if attempt >= max_retries or delay > LINKEDIN_MAX_WAIT:
+                    self.record("gave_up")
+                    return response
+                response.close()
+
+            attempt += 1
+            self.record("retried")
+            print(f"🔁 LinkedIn {method} {url.split('?')[0]} retry {attempt}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+    def retry_after(self, response):
+        """How long a caller should wait before trying again, for a final 429/503"""
+        if response.status_code not in REJECTED_STATUS:
+            return None
+        return parse_retry_after(response.headers.get("Retry-After")) or LINKEDIN_BACKOFF_MAX
+
+    def get(self, url, access_token=None, **kwargs):
+        return self.request("GET", url, access_token=access_token, **kwargs)
+
+    def post(self, url, access_token=None, **kwargs):
+        return self.request("POST", url, access_token=access_token, **kwargs)
+
+
+linkedin_client = LinkedInClient()
@@ -0,0 +1,276 @@
+import os
+import copy
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+
+# ---------------- LLM CACHE CONFIG ----------------
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 1000))
+
+
+def normalize_prompt(prompt):
+    """Whitespace-insensitive form so re-indented but identical prompts share a key"""
+    return " ".join(str(prompt).split())
+
+
+class LLMCache:
+    """TTL cache of parsed LLM results with single-flight coalescing.
+
+    Identical prompts arriving while a call is in flight wait for that call
+    instead of starting their own (double-clicks, client retries).
+    """
+
+    def __init__(self, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._ainflight = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0, "saved_seconds": 0.0}
+
+    def key(self, prompt, namespace=""):
+        return hashlib.sha256(f"{namespace}\n{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["expires_at"] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            self._stats["saved_seconds"] += entry["elapsed"]
+            return copy.deepcopy(entry["value"])
+
+    def _store(self, key, value, elapsed):
+        with self._lock:
+            self._entries[key] = {"value": value, "elapsed": elapsed, "expires_at": time.time() + self.ttl}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _record_coalesced(self, elapsed):
+        with self._lock:
+            self._stats["coalesced"] += 1
+            self._stats["saved_seconds"] += elapsed
+
+    def _record_miss(self, failed):
+        with self._lock:
+            self._stats["misses"] += 1
+            if failed:
+                self._stats["errors"] += 1
+
+    def get(self, prompt, namespace=""):
+        """Cached result for `prompt`, or None"""
+        return self._lookup(self.key(prompt, namespace))
+
+    def get_or_call(self, prompt, call, namespace=""):
+        """Return the cached result for `prompt`, or run `call()` once and cache it"""
+        key = self.key(prompt, namespace)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = {"done": threading.Event(), "value": None, "error": None, "elapsed": 0.0}
+
+        if not leader:
+            flight["done"].wait()
+            if flight["error"] is not None:
+                raise flight["error"]
+            if flight.get("abandoned"):
+                # The leader's stream was dropped before it finished: make the call ourselves
+                return self.get_or_call(prompt, call, namespace)
+            self._record_coalesced(flight["elapsed"])
+            return copy.deepcopy(flight["value"])
+
+        started = time.monotonic()
+        try:
+            value = call()
+            flight["value"] = value
+            flight["elapsed"] = time.monotonic() - started
+            self._store(key, value, flight["elapsed"])
+            self._record_miss(failed=False)
+            return copy.deepcopy(value)
+        except Exception as e:
+            flight["error"] = e
+            self._record_miss(failed=True)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight["done"].set()
+
+    async def aget_or_call(self, prompt, call, namespace=""):
+        """Async get_or_call; `call` returns an awaitable"""
+        key = self.key(prompt, namespace)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        future = self._ainflight.get(key)
+        if future is not None:
+            shared = await asyncio.shield(future)
+            if shared is None:
+                # The leader was cancelled or its stream dropped: make the call ourselves
+                return await self.aget_or_call(prompt, call, namespace)
+            value, elapsed = shared
+            self._record_coalesced(elapsed)
+            return copy.deepcopy(value)
+
+        future = asyncio.get_running_loop().create_future()
+        self._ainflight[key] = future
+        started = time.monotonic()
+        try:
+            value = await call()
+            elapsed = time.monotonic() - started
+            self._store(key, value, elapsed)
+            self._record_miss(failed=False)
+            future.set_result((value, elapsed))
+            return copy.deepcopy(value)
+        except asyncio.CancelledError:
+            future.set_result(None)
+            raise
+        except Exception as e:
+            self._record_miss(failed=True)
+            future.set_exception(e)
+            # Followers re-raise it; mark it retrieved so an unshared failure isn't logged
+            future.exception()
+            raise
+        finally:
+            self._ainflight.pop(key, None)
+
+    def stream_or_join(self, prompt, stream, result_of, replay, namespace=""):
+        """Generator form of get_or_call for streamed calls.
+
+        The leader yields `stream()`'s events live and caches the first
+        `result_of(event)` that isn't None. Cache hits and identical prompts
+        already in flight (streamed or not) yield `replay(result)` instead of
+        starting another call.
+        """
+        key = self.key(prompt, namespace)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield from replay(cached)
+            return
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = {"done": threading.Event(), "value": None, "error": None, "elapsed": 0.0}
+
+        if not leader:
+            flight["done"].wait()
+            if flight["error"] is not None:
+                raise flight["error"]
+            if flight.get("abandoned"):
+                yield from self.stream_or_join(prompt, stream, result_of, replay, namespace)
+                return
+            self._record_coalesced(flight["elapsed"])
+            yield from replay(copy.deepcopy(flight["value"]))
+            return
+
+        def finish():
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            flight["done"].set()
+
+        started = time.monotonic()
+        try:
+            for event in stream():
+                value = result_of(event)
+                if value is not None and not flight["done"].is_set():
+                    flight["value"] = value
+                    flight["elapsed"] = time.monotonic() - started
+                    self._store(key, value, flight["elapsed"])
+                    self._record_miss(failed=False)
+                    # Followers get the result now, not when our consumer finishes
+                    finish()
+                yield event
+        except Exception as e:
+            if not flight["done"].is_set():
+                flight["error"] = e
+                self._record_miss(failed=True)
+            raise
+        finally:
+            if not flight["done"].is_set():
+                # Consumer went away (client disconnect) or the stream ended without a result
+                flight["abandoned"] = True
+            finish()
+
+    async def astream_or_join(self, prompt, stream, result_of, replay, namespace=""):
+        """Async stream_or_join; `stream()` is an async iterator, `replay` a plain iterable"""
+        key = self.key(prompt, namespace)
+        cached = self._lookup(key)
+        if cached is not None:
+            for event in replay(cached):
+                yield event
+            return
+
+        future = self._ainflight.get(key)
+        if future is not None:
+            shared = await asyncio.shield(future)
+            if shared is None:
+                async for event in self.astream_or_join(prompt, stream, result_of, replay, namespace):
+                    yield event
+                return
+            value, elapsed = shared
+            self._record_coalesced(elapsed)
+            for event in replay(copy.deepcopy(value)):
+                yield event
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._ainflight[key] = future
+
+        def finish():
+            if self._ainflight.get(key) is future:
+                del self._ainflight[key]
+
+        started = time.monotonic()
+        try:
+            async for event in stream():
+                value = result_of(event)
+                if value is not None and not future.done():
+                    elapsed = time.monotonic() - started
+                    self._store(key, value, elapsed)
+                    self._record_miss(failed=False)
+                    future.set_result((value, elapsed))
+                    finish()
+                yield event
+        except Exception as e:
+            if not future.done():
+                self._record_miss(failed=True)
+                future.set_exception(e)
+                future.exception()
+            raise
+        finally:
+            if not future.done():
+                # Cancelled, consumer went away, or no result: followers make their own call
+                future.set_result(None)
+            finish()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"] + self._stats["coalesced"]
+            served = self._stats["hits"] + self._stats["coalesced"]
+            return {
+                **self._stats,
+                "saved_seconds": round(self._stats["saved_seconds"], 2),
+                "hit_rate": round(served / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+llm_cache = LLMCache()
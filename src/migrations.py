@@ -0,0 +1,213 @@
+from src.db import get_conn
+
+# ---------------- SCHEMA MIGRATIONS ----------------
+# Applied in order, once per database. Never edit a shipped migration;
+# append a new one instead.
+MIGRATIONS = [
+    (1, "create users", """
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL PRIMARY KEY,
+        full_name TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """),
+    (2, "create user_details", """
+    CREATE TABLE IF NOT EXISTS user_details (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+        name TEXT,
+        about TEXT,
+        industry TEXT,
+        website TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    -- Tables created by the old src/user_details.py DDL lack user_id
+    ALTER TABLE user_details
+        ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users(id) ON DELETE CASCADE;
+    """),
+    (3, "index hot lookups", """
+    -- Same name Postgres gives the UNIQUE constraint index, so this is a no-op
+    -- wherever the constraint already exists
+    CREATE UNIQUE INDEX IF NOT EXISTS users_email_key ON users (email);
+    CREATE INDEX IF NOT EXISTS user_details_user_id_idx ON user_details (user_id);
+    CREATE INDEX IF NOT EXISTS user_details_created_at_idx ON user_details (created_at DESC);
+    """),
+    (4, "create image_cache", """
+    CREATE TABLE IF NOT EXISTS image_cache (
+        key TEXT PRIMARY KEY,
+        prompt TEXT NOT NULL,
+        model TEXT NOT NULL,
+        image_url TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        expires_at TIMESTAMP NOT NULL,
+        last_hit_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS image_cache_last_hit_at_idx ON image_cache (last_hit_at);
+    """),
+    (5, "create jobs", """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id BIGSERIAL PRIMARY KEY,
+        kind TEXT NOT NULL,
+        payload JSONB NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL DEFAULT 3,
+        result JSONB,
+        error TEXT,
+        run_after TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        locked_at TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    -- Dequeue only ever looks at due, queued jobs
+    CREATE INDEX IF NOT EXISTS jobs_queued_run_after_idx ON jobs (run_after, id) WHERE status = 'queued';
+    CREATE INDEX IF NOT EXISTS jobs_running_locked_at_idx ON jobs (locked_at) WHERE status = 'running';
+    """),
+    (6, "store linkedin urn on users", """
+    ALTER TABLE users ADD COLUMN IF NOT EXISTS linkedin_urn TEXT;
+    """),
+    (7, "create linkedin_tokens", """
+    -- access_token / refresh_token hold Fernet ciphertext, never raw tokens
+    CREATE TABLE IF NOT EXISTS linkedin_tokens (
+        user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+        access_token TEXT NOT NULL,
+        refresh_token TEXT,
+        expires_at TIMESTAMP NOT NULL,
+        refresh_expires_at TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS linkedin_tokens_expires_at_idx ON linkedin_tokens (expires_at)
+        WHERE refresh_token IS NOT NULL;
+    """),
+    (8, "create scheduled_posts", """
+    CREATE TABLE IF NOT EXISTS scheduled_posts (
+        id BIGSERIAL PRIMARY KEY,
+        user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        post_type TEXT NOT NULL,
+        content_data JSONB NOT NULL,
+        image_urls JSONB NOT NULL DEFAULT '[]',
+        publish_at TIMESTAMPTZ NOT NULL,
+        status TEXT NOT NULL DEFAULT 'scheduled',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL DEFAULT 3,
+        result JSONB,
+        last_error TEXT,
+        locked_at TIMESTAMPTZ,
+        created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS scheduled_posts_due_idx ON scheduled_posts (publish_at, id)
+        WHERE status = 'scheduled';
+    CREATE INDEX IF NOT EXISTS scheduled_posts_publishing_idx ON scheduled_posts (locked_at)
+        WHERE status = 'publishing';
+    CREATE INDEX IF NOT EXISTS scheduled_posts_user_id_idx ON scheduled_posts (user_id, publish_at);
+    """),
+    (9, "create website_summaries", """
+    -- Keyed by user_details.website as entered, so clients sharing a site share one summary
+    CREATE TABLE IF NOT EXISTS website_summaries (
+        website TEXT PRIMARY KEY,
+        url TEXT,
+        summary TEXT,
+        content_hash TEXT,
+        etag TEXT,
+        last_modified TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        error TEXT,
+        fetched_at TIMESTAMP,
+        refresh_after TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS website_summaries_refresh_after_idx ON website_summaries (refresh_after);
+    """),
+    (10, "create website_pages", """
+    -- Text of each crawled page, replaced wholesale on every successful crawl
+    CREATE TABLE IF NOT EXISTS website_pages (
+        website TEXT NOT NULL REFERENCES website_summaries(website) ON DELETE CASCADE,
+        url TEXT NOT NULL,
+        depth INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        content_hash TEXT NOT NULL,
+        fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (website, url)
+    );
+    """),
+    (11, "unique user_details per user", """
+    -- Keep each user's latest profile row (what the loaders already read). On big
+    -- tables run python -m src.compaction first so this pass finds nothing to do.
+    DELETE FROM user_details ud USING user_details newer
+        WHERE newer.user_id = ud.user_id AND newer.id > ud.id;
+    DELETE FROM user_details ud USING user_details newer
+        WHERE ud.user_id IS NULL AND newer.user_id IS NULL AND newer.id > ud.id;
+    ALTER TABLE user_details ADD CONSTRAINT user_details_user_id_key UNIQUE (user_id);
+    -- Superseded by the constraint's index
+    DROP INDEX IF EXISTS user_details_user_id_idx;
+    -- Profiles saved without a user (GET /user) share one row instead of piling up
+    CREATE UNIQUE INDEX IF NOT EXISTS user_details_anonymous_key ON user_details ((user_id IS NULL))
+        WHERE user_id IS NULL;
+    """),
+    (12, "linkedin_tokens refresh claims", """
+    -- Set while a worker or request is refreshing the user's token, so nobody else does
+    ALTER TABLE linkedin_tokens ADD COLUMN IF NOT EXISTS refreshing_at TIMESTAMP;
+    """),
+    (13, "scheduled_posts per-user due index", """
+    -- Lets the scheduler find each user's earliest due post without sorting the queue
+    CREATE INDEX IF NOT EXISTS scheduled_posts_user_due_idx
+        ON scheduled_posts (user_id, publish_at, id) WHERE status = 'scheduled';
+    """),
+]
+
+# Arbitrary constant so concurrent app instances don't migrate at the same time
+MIGRATION_LOCK_ID = 72340191
+
+
+def run_migrations(migrations=MIGRATIONS):
+    """Bring the schema up to the latest version; returns the versions applied"""
+    applied = []
+    with get_conn() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+            cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+            conn.commit()
+
+            cur.execute("SELECT version FROM schema_migrations")
+            done = {row[0] for row in cur.fetchall()}
+
+            for version, name, ddl in migrations:
+                if version in done:
+                    continue
+                try:
+                    cur.execute(ddl)
+                    cur.execute(
+                        "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                        (version, name)
+                    )
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                print(f"✅ Applied migration {version}: {name}")
+                applied.append(version)
+        finally:
+            conn.rollback()
+            cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+            conn.commit()
+            cur.close()
+    return applied
+
+
+if __name__ == "__main__":
+    # Deploy step: python -m src.migrations
+    versions = run_migrations()
+    print(f"🚀 Schema up to date ({len(versions)} migration(s) applied)")
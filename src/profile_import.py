@@ -0,0 +1,295 @@
+import os
+import io
+import re
+import csv
+import json
+import time
+import zipfile
+import tempfile
+from src.db import get_conn
+from src.user_details import profile_cache
+
+# ---------------- PROFILE UPLOAD CONFIG ----------------
+# Largest upload accepted: a full LinkedIn data archive, not just Profile.csv
+PROFILE_UPLOAD_MAX_BYTES = int(os.getenv("PROFILE_UPLOAD_MAX_BYTES", 100 * 1024 * 1024))
+# Uncompressed size of the profile file inside an archive (zip bomb guard)
+PROFILE_MEMBER_MAX_BYTES = 10 * 1024 * 1024
+PROFILE_FILES = ("profile.csv", "profile.json")
+UPLOAD_TYPES = (".csv", ".json", ".zip")
+# Bulk import: per-row errors returned in the response, and the longest field accepted
+BULK_MAX_ERRORS = 1000
+BULK_FIELD_MAX_CHARS = 20000
+BULK_USER_ID_COLUMNS = ("user_id", "User ID", "userId")
+BULK_NAME_COLUMNS = ("Name", "name", "Full Name", "full_name")
+
+# Column names in LinkedIn's Profile.csv first, then the spellings seen in JSON exports
+PROFILE_FIELDS = {
+    "first_name": ("First Name", "firstName", "first_name"),
+    "last_name": ("Last Name", "lastName", "last_name"),
+    "about": ("Summary", "summary", "About", "about"),
+    "industry": ("Industry", "industry", "industryName"),
+    "website": ("Websites", "websites", "Website", "website"),
+}
+# "[COMPANY:acme.com,PERSONAL:me.dev]" in LinkedIn exports
+WEBSITE_LABEL_RE = re.compile(r"^[A-Za-z_ ]+:(?!//)")
+
+
+class ProfileUploadError(ValueError):
+    """The upload isn't a profile we can read; the message is safe to show the user"""
+
+
+class ProfileUploadTooLarge(ProfileUploadError):
+    """Over PROFILE_UPLOAD_MAX_BYTES (or the archive's profile file is over its cap)"""
+
+
+def first_website(value):
+    """First URL of a Websites value, without LinkedIn's [LABEL:...] wrapping"""
+    if isinstance(value, list):
+        value = ",".join(str(item.get("url", "")) if isinstance(item, dict) else str(item) for item in value)
+    for item in str(value or "").strip().strip("[]").split(","):
+        item = WEBSITE_LABEL_RE.sub("", item.strip()).strip()
+        if item and item.lower() != "nan":
+            return item
+    return ""
+
+
+def pick_fields(record):
+    """Just the profile fields we store, from one CSV row or JSON object"""
+    found = {}
+    for field, names in PROFILE_FIELDS.items():
+        value = next((record[name] for name in names if record.get(name) not in (None, "")), "")
+        found[field] = value if field == "website" else str(value).strip()
+    found["website"] = first_website(found["website"])
+    return found
+
+
+def read_profile_csv(binary):
+    """First data row of a CSV stream; nothing after it is read"""
+    text = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text)
+        row = next(reader, None)
+        columns = list(reader.fieldnames or [])
+    except UnicodeDecodeError:
+        raise ProfileUploadError("CSV file encoding error. Please ensure file is UTF-8 encoded.")
+    except csv.Error as e:
+        raise ProfileUploadError(f"CSV processing error: {e}")
+    finally:
+        text.detach()
+    if row is None:
+        raise ProfileUploadError("CSV file is empty")
+    return pick_fields(row), columns
+
+
+def read_profile_json(binary, max_bytes=PROFILE_MEMBER_MAX_BYTES):
+    """Profile.json: an object, or a list whose first entry is the profile"""
+    raw = binary.read(max_bytes + 1)
+    if len(raw) > max_bytes:
+        raise ProfileUploadTooLarge(f"Profile.json is larger than {max_bytes} bytes")
+    try:
+        data = json.loads(raw.decode("utf-8-sig"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ProfileUploadError(f"JSON processing error: {e}")
+    if isinstance(data, list):
+        data = data[0] if data else None
+    if isinstance(data, dict) and isinstance(data.get("profile"), dict):
+        data = data["profile"]
+    if not isinstance(data, dict) or not data:
+        raise ProfileUploadError("Profile.json doesn't contain a profile")
+    return pick_fields(data), list(data.keys())
+
+
+def read_profile_archive(binary):
+    """Profile.csv (or Profile.json) from a LinkedIn data archive, read straight out of the zip"""
+    try:
+        archive = zipfile.ZipFile(binary)
+    except zipfile.BadZipFile:
+        raise ProfileUploadError("Not a valid zip archive")
+    with archive:
+        members = {os.path.basename(info.filename).lower(): info for info in archive.infolist() if not info.is_dir()}
+        name = next((name for name in PROFILE_FILES if name in members), None)
+        if name is None:
+            raise ProfileUploadError("Archive has no Profile.csv or Profile.json")
+        info = members[name]
+        if info.file_size > PROFILE_MEMBER_MAX_BYTES:
+            raise ProfileUploadTooLarge(f"{info.filename} is larger than {PROFILE_MEMBER_MAX_BYTES} bytes")
+        with archive.open(info) as member:
+            if name.endswith(".json"):
+                profile, columns = read_profile_json(member)
+            else:
+                profile, columns = read_profile_csv(member)
+    return profile, columns, info.filename
+
+
+def read_profile_upload(binary, filename, size=None, max_bytes=PROFILE_UPLOAD_MAX_BYTES):
+    """Profile fields from an uploaded .csv, .json or .zip file object.
+
+    Reads only what it needs from `binary` (seekable, e.g. UploadFile.file);
+    returns a summary dict with the extracted `profile`.
+    """
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension not in UPLOAD_TYPES:
+        raise ProfileUploadError("Invalid file type. Upload a CSV, Profile.json or LinkedIn data archive (.zip).")
+    if size is None:
+        size = binary.seek(0, os.SEEK_END)
+        binary.seek(0)
+    if size > max_bytes:
+        raise ProfileUploadTooLarge(f"File is larger than {max_bytes} bytes")
+
+    source = filename
+    if extension == ".zip":
+        profile, columns, source = read_profile_archive(binary)
+    elif extension == ".json":
+        profile, columns = read_profile_json(binary)
+    else:
+        profile, columns = read_profile_csv(binary)
+
+    return {
+        "format": extension.lstrip("."),
+        "source": source,
+        "bytes": size,
+        "columns": columns,
+        "fields_found": sorted(field for field, value in profile.items() if value),
+        "profile": profile,
+    }
+
+
+# ---------------- BULK IMPORT ----------------
+class BulkImport:
+    """Validates a multi-row profile CSV into COPY-ready rows plus per-row errors"""
+
+    def __init__(self, max_errors=BULK_MAX_ERRORS):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.valid = 0
+        self.failed = 0
+        self.errors = []
+        self._seen = {}
+
+    @property
+    def user_ids(self):
+        """Every user_id that passed validation (and may have been written)"""
+        return list(self._seen)
+
+    def error(self, line, user_id, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": line, "user_id": user_id, "error": message})
+
+    def validate(self, line, record):
+        """(user_id, name, about, industry, website) for a good row, else None with the error recorded"""
+        raw_id = next((record[name] for name in BULK_USER_ID_COLUMNS if record.get(name) not in (None, "")), "")
+        raw_id = str(raw_id).strip()
+        if not raw_id.isdigit() or int(raw_id) == 0 or int(raw_id) > 2**31 - 1:
+            self.error(line, raw_id or None, "user_id must be a positive integer")
+            return None
+        user_id = int(raw_id)
+        if user_id in self._seen:
+            self.error(line, user_id, f"duplicate user_id (first seen on row {self._seen[user_id]})")
+            return None
+        self._seen[user_id] = line
+
+        profile = pick_fields(record)
+        name = next((str(record[column]).strip() for column in BULK_NAME_COLUMNS if record.get(column)), "")
+        name = name or f"{profile['first_name']} {profile['last_name']}".strip()
+        values = (name, profile["about"], profile["industry"], profile["website"])
+        if not any(values):
+            self.error(line, user_id, "no profile fields (name, summary, industry or website)")
+            return None
+        if any(len(value) > BULK_FIELD_MAX_CHARS for value in values):
+            self.error(line, user_id, f"a field is longer than {BULK_FIELD_MAX_CHARS} characters")
+            return None
+        return (user_id, *values)
+
+    def write_copy_file(self, binary, out):
+        """Stream the upload's rows into `out` as COPY csv (line number first); returns out"""
+        text = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+        writer = csv.writer(out)
+        try:
+            reader = csv.DictReader(text)
+            if not reader.fieldnames or not set(BULK_USER_ID_COLUMNS) & set(reader.fieldnames):
+                raise ProfileUploadError("CSV needs a user_id column")
+            for record in reader:
+                self.rows += 1
+                row = self.validate(reader.line_num, record)
+                if row is not None:
+                    writer.writerow((reader.line_num, *row))
+                    self.valid += 1
+        except UnicodeDecodeError:
+            raise ProfileUploadError("CSV file encoding error. Please ensure file is UTF-8 encoded.")
+        except csv.Error as e:
+            raise ProfileUploadError(f"CSV processing error on row {self.rows + 1}: {e}")
+        finally:
+            text.detach()
+        out.seek(0)
+        return out
+
+
+def bulk_import_profiles(binary):
+    """Load a multi-row profile CSV (one row per user_id) into user_details.
+
+    Valid rows are COPYed into a temp staging table and applied in one
+    statement; rows for unknown users come back as per-row errors with the
+    validation ones. Returns counts, errors and rows/second.
+    """
+    started = time.perf_counter()
+    job = BulkImport()
+    # Validated rows wait on disk past 8 MB, so memory doesn't grow with the upload
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024, mode="w+", newline="", encoding="utf-8") as staged:
+        job.write_copy_file(binary, staged)
+        inserted = updated = 0
+        if job.valid:
+            with get_conn() as conn:
+                cur = conn.cursor()
+                try:
+                    cur.execute("""
+                    CREATE TEMP TABLE profile_import (
+                        line INTEGER, user_id INTEGER, name TEXT, about TEXT, industry TEXT, website TEXT
+                    ) ON COMMIT DROP
+                    """)
+                    cur.copy_expert("COPY profile_import FROM STDIN WITH (FORMAT csv)", staged)
+                    # Temp tables get no autovacuum stats; without them the join plans are guesses
+                    cur.execute("ANALYZE profile_import")
+
+                    cur.execute("""
+                    DELETE FROM profile_import s
+                    WHERE NOT EXISTS (SELECT 1 FROM users u WHERE u.id = s.user_id)
+                    RETURNING line, user_id
+                    """)
+                    for line, user_id in sorted(cur.fetchall()):
+                        job.error(line, user_id, "user does not exist")
+                        job.valid -= 1
+
+                    cur.execute("""
+                    WITH applied AS (
+                        INSERT INTO user_details (user_id, name, about, industry, website)
+                        SELECT user_id, name, about, industry, website FROM profile_import
+                        ON CONFLICT (user_id) DO UPDATE SET
+                            name = EXCLUDED.name, about = EXCLUDED.about, industry = EXCLUDED.industry,
+                            website = EXCLUDED.website, updated_at = CURRENT_TIMESTAMP
+                        RETURNING (xmax = 0) AS created
+                    )
+                    SELECT count(*) FILTER (WHERE created), count(*) FILTER (WHERE NOT created) FROM applied
+                    """)
+                    inserted, updated = cur.fetchone()
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                finally:
+                    cur.close()
+            profile_cache.invalidate(*job.user_ids)
+
+    elapsed = time.perf_counter() - started
+    job.errors.sort(key=lambda error: error["row"])
+    return {
+        "rows": job.rows,
+        "imported": inserted + updated,
+        "inserted": inserted,
+        "updated": updated,
+        "failed": job.failed,
+        "errors": job.errors,
+        "errors_truncated": job.failed > len(job.errors),
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(job.rows / elapsed, 1) if elapsed else None,
+    }
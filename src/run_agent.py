@@ -1,17 +1,49 @@
 import json
+import asyncio
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
 from langchain.agents import initialize_agent, AgentType
 from langchain_cohere import ChatCohere
 from dotenv import load_dotenv
 from langchain_core.tools import tool
+from src.http_client import get_session
+from src.image_cache import image_cache
+from src.image_providers import get_image_provider
+from src.llm_cache import llm_cache
+from src.structured_output import (
+    generate_post_content, agenerate_post_content, stream_post_content, astream_post_content, post_field_events
+)
+from src.linkedin_client import (
+    linkedin_client, LinkedInAPIError, LinkedInUnavailable, RETRYABLE_STATUS, REJECTED_STATUS, LINKEDIN_MAX_RETRIES
+)
 import os
 load_dotenv()  
 
-def generate_images_direct(topics):
-    """Direct function to generate images without tool wrapper"""
-    print(f"Generating images for topics: {topics}")
-    
-    # Handle input
+# ---------------- IMAGE GENERATION CONFIG ----------------
+# How many prompts of one carousel are generated at once
+IMAGE_PARALLELISM = int(os.getenv("IMAGE_PARALLELISM", 3))
+# Overall budget for a carousel's images; unfinished slots fall back
+IMAGE_DEADLINE = float(os.getenv("IMAGE_DEADLINE", 40))
+
+# Slides per carousel
+MAX_CAROUSEL_IMAGES = 3
+
+# Posts of one /makepost/batch call generated at once
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 10))
+
+# ---------------- LINKEDIN CONFIG ----------------
+# Slides of one carousel uploaded at once
+LINKEDIN_UPLOAD_WORKERS = int(os.getenv("LINKEDIN_UPLOAD_WORKERS", 6))
+
+FALLBACK_IMAGE_URLS = [
+    "https://free-cdn.mitraai.xyz/b4f006e7-f485-4785-a008-3236c284e2d8.jpg",
+    "https://free-cdn.mitraai.xyz/3adcd7be-ede2-4cc8-8e89-4298bf6cbbf8.jpg",
+    "https://free-cdn.mitraai.xyz/8329263a-fdcc-4429-964d-de61a90e0f23.jpg"
+]
+
+def normalize_topics(topics):
+    """Accept a JSON string, comma list or list of prompts; cap at 3 images"""
     if isinstance(topics, str):
         try:
             topics = json.loads(topics)
@@ -19,112 +51,244 @@ def generate_images_direct(topics):
             topics = topics.split(',') if ',' in topics else [topics]
     elif not isinstance(topics, list):
         topics = [str(topics)]
-    
-    # Limit to 3 images max
-    topics = topics[:3]
-    
-    images = []
-    for i, topic in enumerate(topics):
-        print(f"Generating image {i+1}/{len(topics)}: {topic}")
-        
-        url = "https://subnp.com/api/free/generate"  
-        headers = {"Content-Type": "application/json"}
-        data = {"prompt": str(topic).strip(), "model": "magic"}
-        
-        try:
-            response = requests.post(url, headers=headers, json=data, timeout=30)
-            data_raw = response.content.decode().strip()
 
-            try:
-                data = json.loads(data_raw)
-            except json.JSONDecodeError:
+    return topics[:MAX_CAROUSEL_IMAGES]
+
+def fill_failed_slots(images):
+    """Replace failed (None) slots with fallback CDN images, keeping slide order"""
+    filled = [
+        url or FALLBACK_IMAGE_URLS[i % len(FALLBACK_IMAGE_URLS)]
+        for i, url in enumerate(images)
+    ]
+    print(f"Total images generated: {sum(1 for url in images if url)}/{len(images)}")
+    return filled
+
+def generate_image(topic):
+    """Generate a single image (or reuse a cached one); returns its URL or None on failure"""
+    provider = get_image_provider()
+    cached = image_cache.get(topic, provider.model)
+    if cached:
+        print(f"Image cache hit: {cached}")
+        return cached
+
+    try:
+        image_url = provider.generate(str(topic).strip())
+    except Exception as e:
+        print(f"Error generating image for topic {topic}: {e}")
+        return None
+
+    print(f"Generated: {image_url}")
+    image_cache.set(topic, provider.model, image_url)
+    return image_url
+
+def generate_images_direct(topics, parallelism=IMAGE_PARALLELISM, deadline=IMAGE_DEADLINE):
+    """Direct function to generate images without tool wrapper.
+
+    Prompts run concurrently (at most `parallelism` at once). Anything not done
+    within `deadline` seconds, or that failed, gets a fallback image instead.
+    """
+    print(f"Generating images for topics: {topics}")
+    topics = normalize_topics(topics)
+    if not topics:
+        return []
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(topics))))
+    try:
+        futures = {executor.submit(generate_image, topic): i for i, topic in enumerate(topics)}
+        return collect_images(futures, len(topics), deadline)
+    finally:
+        # Don't wait on stragglers; they finish (or time out) in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def collect_images(futures, count, deadline=IMAGE_DEADLINE):
+    """Wait up to `deadline` for {future: slot}; failed or unfinished slots get fallbacks"""
+    images = [None] * count
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            images[futures[future]] = future.result()
+    except FuturesTimeout:
+        print(f"Image deadline of {deadline}s hit, returning partial results")
+    return fill_failed_slots(images)
+
+async def generate_image_async(topic, on_progress=None):
+    """Async generate_image on the shared HTTP client; `on_progress(event)` sees provider progress events"""
+    provider = get_image_provider()
+    # Cache backends are blocking (disk/Postgres), so keep them off the event loop
+    cached = await asyncio.to_thread(image_cache.get, topic, provider.model)
+    if cached:
+        print(f"Image cache hit: {cached}")
+        return cached
+
+    try:
+        image_url = await provider.agenerate(str(topic).strip(), on_progress)
+    except Exception as e:
+        print(f"Error generating image for topic {topic}: {e}")
+        return None
+
+    print(f"Generated: {image_url}")
+    await asyncio.to_thread(image_cache.set, topic, provider.model, image_url)
+    return image_url
+
+class ImageSlots:
+    """Carousel image prompts, started one slot at a time.
+
+    Slots can be started while the LLM is still writing the rest of the
+    post. Results land on `queue` as {"event": "image"} and provider progress
+    as {"event": "image_progress"}; events() yields them until close() has
+    been called and every slot has finished or the deadline has passed.
+    """
+
+    def __init__(self, parallelism=IMAGE_PARALLELISM):
+        self.queue = asyncio.Queue()
+        self.semaphore = asyncio.Semaphore(max(1, parallelism))
+        self.prompts = {}
+        self.tasks = {}
+        self.closed_at = None
+
+    def start(self, i, topic):
+        """Generate `topic` for slot i, replacing whatever the slot was generating"""
+        if self.prompts.get(i) == topic:
+            return
+        if i in self.tasks:
+            self.tasks[i].cancel()
+        self.prompts[i] = topic
+        self.tasks[i] = asyncio.create_task(self._run(i, topic))
+
+    def settle(self, topics):
+        """Final prompt list: restart slots whose prompt changed, drop extra slots"""
+        for i, topic in enumerate(topics):
+            self.start(i, topic)
+        for i in [i for i in self.tasks if i >= len(topics)]:
+            self.tasks.pop(i).cancel()
+            self.prompts.pop(i)
+
+    def close(self):
+        """No more slots will be started; the deadline starts counting now"""
+        self.closed_at = asyncio.get_running_loop().time()
+        self.queue.put_nowait({"event": None})
+
+    def cancel(self):
+        for task in self.tasks.values():
+            task.cancel()
+
+    async def _run(self, i, topic):
+        def on_progress(event):
+            self.queue.put_nowait({
+                "event": "image_progress",
+                "index": i,
+                "prompt": topic,
+                "status": event.get("status"),
+                "message": event.get("message"),
+            })
+
+        async with self.semaphore:
+            image_url = await generate_image_async(topic, on_progress=on_progress)
+        self.queue.put_nowait({"event": "image", "index": i, "prompt": topic, "image_url": image_url})
+
+    async def events(self, deadline=IMAGE_DEADLINE):
+        loop = asyncio.get_running_loop()
+        try:
+            while self.closed_at is None or not self.queue.empty() or any(not t.done() for t in self.tasks.values()):
+                timeout = None if self.closed_at is None else max(0, self.closed_at + deadline - loop.time())
                 try:
-                    data = json.loads(data_raw.split("\n")[-1][6:])
-                except:
-                    print(f"Failed to parse response for topic {topic}: {data_raw}")
+                    event = await asyncio.wait_for(self.queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pending = sum(1 for task in self.tasks.values() if not task.done())
+                    print(f"Image deadline of {deadline}s hit, cancelling {pending} prompt(s)")
+                    return
+                if event["event"] is None:
+                    continue
+                # Drop results of replaced slots, and failed prompts (callers fill those)
+                if "prompt" in event and event["prompt"] != self.prompts.get(event["index"]):
                     continue
+                if event["event"] == "image" and not event["image_url"]:
+                    continue
+                event.pop("prompt", None)
+                yield event
+        finally:
+            self.cancel()
 
-            if 'imageUrl' in data:
-                print(f"Generated: {data['imageUrl']}")
-                images.append(data['imageUrl'])
-            else:
-                print(f"No imageUrl found in response for topic {topic}: {data}")
-                
-        except Exception as e:
-            print(f"Error generating image for topic {topic}: {e}")
-            
-    print(f"Total images generated: {len(images)}")
-    return images
+async def iter_image_events_async(topics, parallelism=IMAGE_PARALLELISM, deadline=IMAGE_DEADLINE):
+    """Yield image events for a carousel as they happen.
+
+    {"event": "image_progress", "index", "status", "message"} for each
+    progress event the provider reports, and {"event": "image", "index",
+    "image_url"} the moment a slot's image is ready. Failed prompts are
+    skipped and anything still running at the deadline is cancelled, so
+    callers fill the missing slots themselves.
+    """
+    slots = ImageSlots(parallelism)
+    slots.settle(normalize_topics(topics))
+    slots.close()
+    async for event in slots.events(deadline):
+        yield event
+
+async def iter_images_async(topics, parallelism=IMAGE_PARALLELISM, deadline=IMAGE_DEADLINE):
+    """Yield (slot, image_url) for each prompt as soon as it finishes; see iter_image_events_async"""
+    async for event in iter_image_events_async(topics, parallelism, deadline):
+        if event["event"] == "image":
+            yield event["index"], event["image_url"]
+
+async def generate_images_async(topics, parallelism=IMAGE_PARALLELISM, deadline=IMAGE_DEADLINE):
+    """Async variant of generate_images_direct; slow prompts are cancelled at the deadline"""
+    print(f"Generating images for topics: {topics}")
+    topics = normalize_topics(topics)
+    if not topics:
+        return []
+
+    images = [None] * len(topics)
+    async for i, image_url in iter_images_async(topics, parallelism, deadline):
+        images[i] = image_url
+    return fill_failed_slots(images)
 
 @tool
 def generate_images(topics: str):
     """Given a list of image prompts as a JSON string, generate and return a list of direct image URLs."""
     print(f"Generating images for topics: {topics}")
-    
-    # Parse topics if it's a string
-    if isinstance(topics, str):
-        try:
-            topics = json.loads(topics)
-        except:
-            topics = topics.split(',') if ',' in topics else [topics]
-    elif isinstance(topics, list):
-        # Already a list, use as is
-        pass
-    else:
-        topics = [str(topics)]
-    
-    # Limit to 3 images max to prevent spam
-    topics = topics[:3]
-    
+    topics = normalize_topics(topics)
+
     images = []
     for i, topic in enumerate(topics):
         print(f"Generating image {i+1}/{len(topics)}: {topic}")
-        
-        url = "https://subnp.com/api/free/generate"  
-        headers = {"Content-Type": "application/json"}
-        data = {"prompt": str(topic).strip(), "model": "magic"}
-        
-        try:
-            response = requests.post(url, headers=headers, json=data, timeout=30)
-            data_raw = response.content.decode().strip()
-
-            try:
-                data = json.loads(data_raw)
-            except json.JSONDecodeError:
-                try:
-                    data = json.loads(data_raw.split("\n")[-1][6:])
-                except:
-                    print(f"Failed to parse response for topic {topic}: {data_raw}")
-                    continue
+        image_url = generate_image(topic)
+        if image_url:
+            images.append(image_url)
 
-            if 'imageUrl' in data:
-                print(f"Generated: {data['imageUrl']}")
-                images.append(data['imageUrl'])
-            else:
-                print(f"No imageUrl found in response for topic {topic}: {data}")
-                
-        except Exception as e:
-            print(f"Error generating image for topic {topic}: {e}")
-            
     print(f"Total images generated: {len(images)}")
     return images
 
-def run_agent(client_info, post_type, target_industry, content_goals):
-    """Generate content and images - returns data to post"""
-    llm = ChatCohere(temperature=0.5)
+LLM_TEMPERATURE = 0.5
+# Ask Cohere for a guaranteed JSON object (needs a model with JSON mode support)
+LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "true").lower() != "false"
+# Part of the LLM cache key, so changing model settings doesn't serve stale results
+LLM_CACHE_NAMESPACE = f"cohere:{LLM_TEMPERATURE}:{'json' if LLM_JSON_MODE else 'text'}"
+# Stream the completion so image prompts start while the rest of the post is written
+LLM_STREAMING = os.getenv("LLM_STREAMING", "true").lower() != "false"
+
+def get_llm():
+    """Chat model used for post generation"""
+    llm = ChatCohere(temperature=LLM_TEMPERATURE)
+    if LLM_JSON_MODE:
+        return llm.bind(response_format={"type": "json_object"})
+    return llm
+
+def build_content_prompt(client_info, post_type, target_industry, content_goals):
+    """Prompt asking the LLM for post text, hashtags and image prompts as JSON"""
     name = client_info.get('name', 'Professional')
     industry = client_info.get('industry', 'Technology')
     about = client_info.get('about', '')
-    website_content = client_info.get('website', '')
+    # Precomputed by src/enrichment.py; never scraped on the request path
+    website_summary = client_info.get('website_summary', '')
+    website_context = f"\n    - Their business (from their website): {website_summary}" if website_summary else ""
     
-    content_prompt = f"""
+    return f"""
     You are creating a LinkedIn {post_type} for {name}, a professional in {industry}.
 
     CONTEXT:
     - Name: {name}
     - Industry: {industry}
     - Content Goal: {content_goals}
-    - Target audience: {target_industry}
+    - Target audience: {target_industry}{website_context}
     
     INSTRUCTIONS:
     Create engaging LinkedIn content that:
@@ -141,115 +305,312 @@ def run_agent(client_info, post_type, target_industry, content_goals):
         "image_instructions": ["Professional visual concept 1", "Supporting visual concept 2", "Engaging visual concept 3"]
     }}"""
 
+def wants_images(post_type, content_data):
+    return post_type.lower() == "carousel" and bool(content_data.get('image_instructions'))
+
+def post_result(event):
+    return event["value"] if event["field"] == "post" else None
+
+def stream_content(content_prompt):
+    """Post fields as the LLM writes them, ending with {"field": "post"}.
+
+    Cached posts replay instantly; a prompt already being generated waits for
+    that call and replays its result (double-clicks, client retries).
+    """
+    if not LLM_STREAMING:
+        content_data = llm_cache.get_or_call(
+            content_prompt,
+            lambda: generate_post_content(get_llm(), content_prompt),
+            namespace=LLM_CACHE_NAMESPACE
+        )
+        yield from post_field_events(content_data)
+        return
+
+    yield from llm_cache.stream_or_join(
+        content_prompt,
+        lambda: stream_post_content(get_llm(), content_prompt),
+        post_result,
+        post_field_events,
+        namespace=LLM_CACHE_NAMESPACE
+    )
+
+def run_agent(client_info, post_type, target_industry, content_goals):
+    """Generate content and images - returns data to post.
+
+    Each image prompt starts generating as soon as the LLM has written it,
+    so images overlap the rest of the completion.
+    """
+    content_prompt = build_content_prompt(client_info, post_type, target_industry, content_goals)
+    carousel = post_type.lower() == "carousel"
+    executor = ThreadPoolExecutor(max_workers=max(1, IMAGE_PARALLELISM))
+    started = {}
 
-    
     try:
-        # Use LLM directly for content generation instead of agent
-        response = llm.invoke(content_prompt)
-        content_output = response.content if hasattr(response, 'content') else str(response)
-        
-        # Extract JSON from response
-        start = content_output.find('{')
-        end = content_output.rfind('}') + 1
-        if start == -1 or end == 0:
-            raise ValueError("No JSON found in response")
-            
-        json_str = content_output[start:end]
-        content_data = json.loads(json_str)
-        
+        content_data = None
+        for event in stream_content(content_prompt):
+            if event["field"] == "image_instruction" and carousel and event["index"] < MAX_CAROUSEL_IMAGES:
+                started[event["index"]] = (event["value"], executor.submit(generate_image, event["value"]))
+            elif event["field"] == "post":
+                content_data = event["value"]
+
+        image_urls = []
+        if wants_images(post_type, content_data):
+            topics = normalize_topics(content_data['image_instructions'])
+            futures = {}
+            for i, topic in enumerate(topics):
+                prompt, future = started.get(i, (None, None))
+                if prompt != topic:
+                    future = executor.submit(generate_image, topic)
+                futures[future] = i
+            image_urls = collect_images(futures, len(topics))
     except Exception as e:
         print(f"Content generation failed: {e}")
         return None
-    
-    # Step 2: Generate images only if carousel and we have instructions
-    image_urls = []
-    if post_type.lower() == "carousel" and content_data.get('image_instructions'):
-        print("Generating images for carousel...")
-        
-        # Call the direct function instead
-        try:
-            image_urls = generate_images_direct(content_data['image_instructions'])
-            if not image_urls:
-                image_urls = [
-                    "https://free-cdn.mitraai.xyz/b4f006e7-f485-4785-a008-3236c284e2d8.jpg",
-                    "https://free-cdn.mitraai.xyz/3adcd7be-ede2-4cc8-8e89-4298bf6cbbf8.jpg",
-                    "https://free-cdn.mitraai.xyz/8329263a-fdcc-4429-964d-de61a90e0f23.jpg"
-                ]
-        except Exception as e:
-            print(f"Image generation failed: {e}")
-            image_urls = []
-    
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
     return {
         "content_data": content_data,
         "image_urls": image_urls
     }
 
-def create_and_post_linkedin_content(content_data, image_urls, post_type, linkedin_urn, access_token):
-    """Takes generated content and posts to LinkedIn"""
-    
-    def upload_image_to_linkedin(image_url, access_token, person_urn):
-        """Download image from URL and upload to LinkedIn"""
+async def generate_content_async(content_prompt):
+    """LLM step of the async pipeline; identical concurrent prompts share one call"""
+    llm = get_llm()
+
+    async def generate():
+        return await agenerate_post_content(llm, content_prompt)
+
+    return await llm_cache.aget_or_call(content_prompt, generate, namespace=LLM_CACHE_NAMESPACE)
+
+async def astream_content(content_prompt):
+    """Async stream_content"""
+    if not LLM_STREAMING:
+        for event in post_field_events(await generate_content_async(content_prompt)):
+            yield event
+        return
+
+    async for event in llm_cache.astream_or_join(
+        content_prompt,
+        lambda: astream_post_content(get_llm(), content_prompt),
+        post_result,
+        post_field_events,
+        namespace=LLM_CACHE_NAMESPACE
+    ):
+        yield event
+
+async def run_agent_async(client_info, post_type, target_industry, content_goals):
+    """Async run_agent: awaits the LLM and image calls instead of blocking a worker thread"""
+    content_data = image_urls = None
+    async for event in run_agent_stream(client_info, post_type, target_industry, content_goals):
+        if event["event"] == "error":
+            return None
+        if event["event"] == "content":
+            content_data = event["content_data"]
+        elif event["event"] == "done":
+            image_urls = event["image_urls"]
+
+    return {
+        "content_data": content_data,
+        "image_urls": image_urls
+    }
+
+async def run_agent_stream(client_info, post_type, target_industry, content_goals):
+    """Streaming run_agent: yields events as each stage finishes.
+
+    {"event": "field"} as each part of the post is written (content_draft,
+    hashtag_suggestions, each image_instruction), {"event": "content"} once the
+    whole reply is validated, {"event": "image_progress"} while the provider
+    works on a slot, one {"event": "image"} per slot as images complete
+    (fallbacks last), then {"event": "done"} with every URL in slide order, or
+    {"event": "error"} if content generation failed. Image prompts start as
+    soon as they are written, while the LLM is still producing the rest.
+    """
+    content_prompt = build_content_prompt(client_info, post_type, target_industry, content_goals)
+    carousel = post_type.lower() == "carousel"
+    slots = ImageSlots()
+
+    async def write_content():
         try:
-            print(f"Uploading image: {image_url}")
-            response = requests.get(image_url, timeout=30)
-            if response.status_code != 200:
-                raise Exception(f"Failed to download image: {response.status_code}")
-                
-            image_data = response.content
-            
-            register_url = "https://api.linkedin.com/v2/assets?action=registerUpload"
-            register_payload = {
-                "registerUploadRequest": {
-                    "recipes": ["urn:li:digitalmediaRecipe:feedshare-image"],
-                    "owner": person_urn,
-                    "serviceRelationships": [
-                        {"relationshipType": "OWNER", "identifier": "urn:li:userGeneratedContent"}
-                    ]
-                }
-            }
-            
-            register_response = requests.post(
-                register_url, 
-                json=register_payload, 
-                headers={'Authorization': f'Bearer {access_token}'},
-                timeout=30
-            )
-            
-            if register_response.status_code != 200:
-                raise Exception(f"Registration failed: {register_response.status_code} - {register_response.text}")
-                
-            register_data = register_response.json()
-            
-            upload_url = register_data['value']['uploadMechanism']['com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest']['uploadUrl']
-            
-            upload_response = requests.post(
-                upload_url, 
-                data=image_data, 
-                headers={'Content-Type': 'application/octet-stream'},
-                timeout=30
-            )
-            
-            if upload_response.status_code not in [200, 201]:
-                raise Exception(f"Upload failed: {upload_response.status_code}")
-            
-            return register_data['value']['asset']
-            
+            async for event in astream_content(content_prompt):
+                if event["field"] == "post":
+                    content_data = event["value"]
+                    slots.settle(normalize_topics(content_data['image_instructions']) if wants_images(post_type, content_data) else [])
+                    slots.queue.put_nowait({"event": "content", "content_data": content_data})
+                    continue
+                if event["field"] == "image_instruction" and carousel and event["index"] < MAX_CAROUSEL_IMAGES:
+                    slots.start(event["index"], event["value"])
+                slots.queue.put_nowait({"event": "field", **event})
         except Exception as e:
-            raise Exception(f"Upload failed for {image_url}: {e}")
+            print(f"Content generation failed: {e}")
+            slots.settle([])
+            slots.queue.put_nowait({"event": "error", "detail": f"Content generation failed: {e}"})
+        finally:
+            slots.close()
+
+    writer = asyncio.create_task(write_content())
+    ready = {}
+    try:
+        async for event in slots.events():
+            if event["event"] == "error":
+                yield event
+                return
+            if event["event"] == "image":
+                ready[event["index"]] = event["image_url"]
+            yield event
+    finally:
+        writer.cancel()
+        slots.cancel()
+
+    image_urls = [ready.get(i) for i in range(len(slots.prompts))]
+    for i, image_url in enumerate(image_urls):
+        if not image_url:
+            image_urls[i] = FALLBACK_IMAGE_URLS[i % len(FALLBACK_IMAGE_URLS)]
+            yield {"event": "image", "index": i, "image_url": image_urls[i], "fallback": True}
+
+    yield {"event": "done", "image_urls": image_urls}
+
+async def run_agent_batch(items, concurrency=BATCH_CONCURRENCY, post_type="carousel"):
+    """Run many posts through the async pipeline, at most `concurrency` at a time.
+
+    Each item is a dict with client_info and content_goals. Returns one
+    {"status": "ok", "result": ...} or {"status": "error", "error": ...} per item, in order.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(item):
+        async with semaphore:
+            client_info = item["client_info"]
+            try:
+                result = await run_agent_async(
+                    client_info=client_info,
+                    post_type=post_type,
+                    target_industry=client_info.get('industry'),
+                    content_goals=item["content_goals"]
+                )
+            except Exception as e:
+                return {"status": "error", "error": str(e)}
+            if result is None:
+                return {"status": "error", "error": "Content generation failed"}
+            result["name"] = client_info['name']
+            result["industry"] = client_info['industry']
+            return {"status": "ok", "result": result}
+
+    return await asyncio.gather(*(run_one(item) for item in items))
+
+def get_linkedin_urn(access_token):
+    """Resolve the member id (`sub`) behind an access token"""
+    profile_response = linkedin_client.get("https://api.linkedin.com/v2/userinfo", access_token=access_token)
     
-    media_urns = []
+    if profile_response.status_code != 200:
+        raise LinkedInAPIError(profile_response.status_code, "Failed to fetch user info from LinkedIn")
     
-    # Upload images for carousel
-    if post_type.lower() == "carousel" and image_urls:
-        print(f"Uploading {len(image_urls)} images...")
+    linkedin_urn = profile_response.json().get("sub")
+    if not linkedin_urn:
+        raise LinkedInAPIError(400, "LinkedIn URN not found in response")
+    return linkedin_urn
+
+class StreamedBody:
+    """File-like view over a streaming download so requests uploads it chunk by chunk"""
+
+    def __init__(self, response):
+        self._raw = response.raw
+        self._raw.decode_content = True
+        length = response.headers.get('Content-Length')
+        # Only trust the length when the bytes we forward are the bytes on the wire
+        if length and not response.headers.get('Content-Encoding'):
+            self.len = int(length)
+
+    def read(self, size=-1):
+        return self._raw.read(size)
+
+def upload_image_to_linkedin(image_url, access_token, person_urn):
+    """Stream an image from its URL straight into a LinkedIn asset upload"""
+    session = get_session()
+    try:
+        print(f"Uploading image: {image_url}")
+        register_url = "https://api.linkedin.com/v2/assets?action=registerUpload"
+        register_payload = {
+            "registerUploadRequest": {
+                "recipes": ["urn:li:digitalmediaRecipe:feedshare-image"],
+                "owner": person_urn,
+                "serviceRelationships": [
+                    {"relationshipType": "OWNER", "identifier": "urn:li:userGeneratedContent"}
+                ]
+            }
+        }
         
-        for i, url in enumerate(image_urls[:6]):  # LinkedIn max 6 slides
+        # Registering twice only leaves an unused asset behind, so it is safe to retry
+        register_response = linkedin_client.post(register_url, access_token=access_token, json=register_payload)
+        
+        if register_response.status_code != 200:
+            raise Exception(f"Registration failed: {register_response.status_code} - {register_response.text}")
+            
+        register_data = register_response.json()
+        
+        upload_url = register_data['value']['uploadMechanism']['com.linkedin.digitalmedia.uploading.MediaUploadHttpRequest']['uploadUrl']
+        
+        # The streamed body can't be replayed, so each retry re-opens the download
+        for attempt in range(LINKEDIN_MAX_RETRIES + 1):
+            # Download is only opened once LinkedIn is ready to receive it
+            with session.get(image_url, timeout=30, stream=True) as response:
+                if response.status_code != 200:
+                    raise Exception(f"Failed to download image: {response.status_code}")
+
+                upload_response = linkedin_client.post(
+                    upload_url,
+                    access_token=access_token,
+                    data=StreamedBody(response),
+                    headers={'Content-Type': 'application/octet-stream'},
+                    max_retries=0
+                )
+
+            if upload_response.status_code in [200, 201] or upload_response.status_code not in RETRYABLE_STATUS:
+                break
+            if attempt < LINKEDIN_MAX_RETRIES:
+                linkedin_client.record("retried")
+                time.sleep(linkedin_client.backoff(attempt, upload_response))
+        
+        if upload_response.status_code not in [200, 201]:
+            raise Exception(f"Upload failed: {upload_response.status_code}")
+        
+        return register_data['value']['asset']
+        
+    except Exception as e:
+        raise Exception(f"Upload failed for {image_url}: {e}")
+
+def upload_carousel_images(image_urls, access_token, person_urn, workers=LINKEDIN_UPLOAD_WORKERS):
+    """Upload slides concurrently; returns media entries in slide order, skipping failures"""
+    image_urls = image_urls[:6]  # LinkedIn max 6 slides
+    print(f"Uploading {len(image_urls)} images...")
+    results = [None] * len(image_urls)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(image_urls)))) as executor:
+        futures = {
+            executor.submit(upload_image_to_linkedin, url, access_token, person_urn): i
+            for i, url in enumerate(image_urls)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
             try:
-                asset_urn = upload_image_to_linkedin(url, access_token, f"urn:li:person:{linkedin_urn}")
-                media_urns.append({"status": "READY", "media": asset_urn})
+                results[i] = {"status": "READY", "media": future.result()}
                 print(f"Successfully uploaded image {i+1}/{len(image_urls)}")
             except Exception as e:
                 print(f"Failed to upload image {i+1}: {e}")
+
+    return [media for media in results if media]
+
+def create_and_post_linkedin_content(content_data, image_urls, post_type, linkedin_urn, access_token):
+    """Takes generated content and posts to LinkedIn.
+
+    Failures carry `outcome_unknown` when the ugcPosts call may have gone
+    through (5xx, timeout after sending); those must not be retried.
+    """
+    media_urns = []
+    
+    # Upload images for carousel
+    if post_type.lower() == "carousel" and image_urls:
+        media_urns = upload_carousel_images(image_urls, access_token, f"urn:li:person:{linkedin_urn}")
     
     # Create LinkedIn post
     full_text = content_data.get('text')
@@ -274,14 +635,13 @@ def create_and_post_linkedin_content(content_data, image_urls, post_type, linked
     
     # Post to LinkedIn
     try:
-        response = requests.post(
+        # Never blindly retried: a 5xx may still have published the post
+        response = linkedin_client.post(
             "https://api.linkedin.com/v2/ugcPosts",
+            access_token=access_token,
             json=payload,
-            headers={
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            },
-            timeout=30
+            headers={'Content-Type': 'application/json'},
+            idempotent=False
         )
         
         if response.status_code == 201:
@@ -293,8 +653,16 @@ def create_and_post_linkedin_content(content_data, image_urls, post_type, linked
         else:
             return {
                 "success": False, 
-                "error": f"LinkedIn API error: {response.status_code} - {response.text}"
+                "error": f"LinkedIn API error: {response.status_code} - {response.text}",
+                "retry_after": linkedin_client.retry_after(response),
+                # A 5xx other than 503 may still have published the post
+                "outcome_unknown": response.status_code >= 500 and response.status_code not in REJECTED_STATUS
             }
             
+    except LinkedInUnavailable as e:
+        return {"success": False, "error": e.detail, "retry_after": e.retry_after}
+    except requests.ConnectTimeout as e:
+        return {"success": False, "error": f"Request failed: {str(e)}"}
     except Exception as e:
-        return {"success": False, "error": f"Request failed: {str(e)}"}
\ No newline at end of file
+        # Read timeouts, dropped connections: LinkedIn may have created the post
+        return {"success": False, "error": f"Request failed: {str(e)}", "outcome_unknown": True}
\ No newline at end of file
@@ -0,0 +1,272 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from psycopg2.extras import Json, RealDictCursor
+from src.db import get_conn
+from src.jobs import backoff_seconds
+from src.linkedin_auth import resolve_linkedin_urn
+from src.linkedin_client import LinkedInUnavailable
+from src.run_agent import create_and_post_linkedin_content
+from src.token_store import get_access_token
+
+# ---------------- SCHEDULER CONFIG ----------------
+SCHEDULER_BATCH_SIZE = int(os.getenv("SCHEDULER_BATCH_SIZE", 20))
+SCHEDULER_CONCURRENCY = int(os.getenv("SCHEDULER_CONCURRENCY", 4))
+SCHEDULER_POLL_INTERVAL = float(os.getenv("SCHEDULER_POLL_INTERVAL", 15))
+# App-wide publish budget, kept well under LinkedIn's daily member/app limits
+SCHEDULER_MAX_PER_MINUTE = int(os.getenv("SCHEDULER_MAX_PER_MINUTE", 30))
+SCHEDULER_MAX_ATTEMPTS = int(os.getenv("SCHEDULER_MAX_ATTEMPTS", 3))
+# A post stuck in 'publishing' this long (crashed worker) goes back to 'scheduled'
+SCHEDULER_LOCK_TIMEOUT = int(os.getenv("SCHEDULER_LOCK_TIMEOUT", 900))
+
+SCHEDULED_POST_COLUMNS = """
+id, user_id, post_type, image_urls, content_data, publish_at, status,
+attempts, last_error, result, created_at, updated_at
+"""
+
+
+# ---------------- ENQUEUE / LIST / CANCEL ----------------
+def schedule_post(user_id, content_data, image_urls, post_type, publish_at):
+    """Queue a generated post for publishing at `publish_at`; returns its id"""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+        INSERT INTO scheduled_posts (user_id, content_data, image_urls, post_type, publish_at, max_attempts)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        RETURNING id
+        """, (user_id, Json(content_data), Json(image_urls), post_type, publish_at, SCHEDULER_MAX_ATTEMPTS))
+        post_id = cur.fetchone()[0]
+        conn.commit()
+        cur.close()
+    return post_id
+
+
+def list_scheduled_posts(user_id, status=None, limit=50, offset=0):
+    """A user's scheduled posts, soonest first"""
+    query = f"SELECT {SCHEDULED_POST_COLUMNS} FROM scheduled_posts WHERE user_id = %s"
+    params = [user_id]
+    if status:
+        query += " AND status = %s"
+        params.append(status)
+    query += " ORDER BY publish_at, id LIMIT %s OFFSET %s"
+    params += [limit, offset]
+
+    with get_conn() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute(query, params)
+        posts = cur.fetchall()
+        cur.close()
+    return posts
+
+
+def cancel_scheduled_post(post_id, user_id):
+    """Cancel a post that hasn't started publishing; returns False if it can't be cancelled"""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+        UPDATE scheduled_posts SET status = 'cancelled', updated_at = CURRENT_TIMESTAMP
+        WHERE id = %s AND user_id = %s AND status = 'scheduled'
+        """, (post_id, user_id))
+        cancelled = cur.rowcount == 1
+        conn.commit()
+        cur.close()
+    return cancelled
+
+
+# ---------------- CLAIM / PUBLISH ----------------
+def claim_due_posts(batch_size=SCHEDULER_BATCH_SIZE):
+    """Take up to `batch_size` due posts, at most one per user per batch.
+
+    Each user's earliest due post is picked first (walking the per-user due
+    index), then the oldest heads are claimed, so one user with a deep backlog
+    can't crowd everyone else out. SKIP LOCKED lets several schedulers run.
+    """
+    with get_conn() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute(f"""
+        WITH heads AS (
+            SELECT DISTINCT ON (user_id) id, publish_at FROM scheduled_posts
+            WHERE status = 'scheduled' AND publish_at <= CURRENT_TIMESTAMP
+            ORDER BY user_id, publish_at, id
+        ), picked AS (
+            SELECT sp.id FROM scheduled_posts sp JOIN heads ON heads.id = sp.id
+            WHERE sp.status = 'scheduled'
+            ORDER BY heads.publish_at, heads.id
+            LIMIT %s
+            FOR UPDATE OF sp SKIP LOCKED
+        )
+        UPDATE scheduled_posts
+        SET status = 'publishing', attempts = attempts + 1,
+            locked_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+        WHERE id IN (SELECT id FROM picked)
+        RETURNING {SCHEDULED_POST_COLUMNS}, max_attempts
+        """, (batch_size,))
+        posts = cur.fetchall()
+        conn.commit()
+        cur.close()
+    return posts
+
+
+def mark_published(post_id, result):
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+        UPDATE scheduled_posts
+        SET status = 'published', result = %s, last_error = NULL, locked_at = NULL,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = %s
+        """, (Json(result), post_id))
+        conn.commit()
+        cur.close()
+
+
+def mark_failed(post_id, error, attempts, max_attempts):
+    """Reschedule with backoff, or give up after max_attempts"""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        if attempts < max_attempts:
+            cur.execute("""
+            UPDATE scheduled_posts
+            SET status = 'scheduled', last_error = %s, locked_at = NULL,
+                publish_at = CURRENT_TIMESTAMP + make_interval(secs => %s),
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+            """, (error, backoff_seconds(attempts), post_id))
+        else:
+            cur.execute("""
+            UPDATE scheduled_posts
+            SET status = 'failed', last_error = %s, locked_at = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+            """, (error, post_id))
+        conn.commit()
+        cur.close()
+
+
+def mark_unknown(post_id, error):
+    """The publish call may have gone through: never retried, left for the user to check"""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+        UPDATE scheduled_posts
+        SET status = 'unknown', last_error = %s, locked_at = NULL, updated_at = CURRENT_TIMESTAMP
+        WHERE id = %s
+        """, (error, post_id))
+        conn.commit()
+        cur.close()
+
+
+def defer_post(post_id, error, retry_after):
+    """LinkedIn throttled us: push the post back without using up an attempt"""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+        UPDATE scheduled_posts
+        SET status = 'scheduled', attempts = GREATEST(attempts - 1, 0), last_error = %s, locked_at = NULL,
+            publish_at = CURRENT_TIMESTAMP + make_interval(secs => %s),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = %s
+        """, (error, retry_after, post_id))
+        conn.commit()
+        cur.close()
+
+
+def requeue_stale_posts(lock_timeout=SCHEDULER_LOCK_TIMEOUT):
+    """Mark posts abandoned by a crashed worker 'unknown': LinkedIn may already have them, so never retry"""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+        UPDATE scheduled_posts
+        SET status = 'unknown', last_error = 'worker lost', locked_at = NULL,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE status = 'publishing'
+          AND locked_at < CURRENT_TIMESTAMP - make_interval(secs => %s)
+        """, (lock_timeout,))
+        count = cur.rowcount
+        conn.commit()
+        cur.close()
+    return count
+
+
+def publish_post(post):
+    """Publish one claimed post with the user's stored LinkedIn token"""
+    try:
+        access_token = get_access_token(post["user_id"])
+        if not access_token:
+            raise Exception(f"No valid LinkedIn token stored for user {post['user_id']}")
+        linkedin_urn = resolve_linkedin_urn(access_token, post["user_id"])
+        result = create_and_post_linkedin_content(
+            content_data=post["content_data"],
+            image_urls=post["image_urls"],
+            post_type=post["post_type"],
+            linkedin_urn=linkedin_urn,
+            access_token=access_token
+        )
+        if not result.get("success") and result.get("retry_after"):
+            raise LinkedInUnavailable(result["error"], result["retry_after"])
+        if not result.get("success") and result.get("outcome_unknown"):
+            # Retrying could publish the post twice
+            print(f"❓ Scheduled post {post['id']} may or may not be on LinkedIn: {result['error']}")
+            mark_unknown(post["id"], result["error"])
+            return False
+        if not result.get("success"):
+            raise Exception(result.get("error", "LinkedIn post failed"))
+    except LinkedInUnavailable as e:
+        print(f"⏳ Scheduled post {post['id']} deferred {e.retry_after:.0f}s: {e.detail}")
+        defer_post(post["id"], e.detail, e.retry_after)
+        return False
+    except Exception as e:
+        print(f"❌ Scheduled post {post['id']} failed: {e}")
+        mark_failed(post["id"], str(e), post["attempts"], post["max_attempts"])
+        return False
+
+    mark_published(post["id"], result)
+    print(f"✅ Scheduled post {post['id']} published")
+    return True
+
+
+class PublishBudget:
+    """Sliding one-minute window capping how many posts the scheduler starts"""
+
+    def __init__(self, per_minute=SCHEDULER_MAX_PER_MINUTE):
+        self.per_minute = per_minute
+        self._starts = []
+        self._lock = threading.Lock()
+
+    def available(self):
+        with self._lock:
+            cutoff = time.monotonic() - 60
+            self._starts = [t for t in self._starts if t > cutoff]
+            return max(0, self.per_minute - len(self._starts))
+
+    def spend(self, count):
+        with self._lock:
+            now = time.monotonic()
+            self._starts.extend([now] * count)
+
+
+def run_scheduler_once(executor, budget, batch_size=SCHEDULER_BATCH_SIZE):
+    """Claim one batch of due posts and publish it; returns how many were claimed"""
+    allowed = min(batch_size, budget.available())
+    if allowed == 0:
+        return 0
+    posts = claim_due_posts(allowed)
+    if posts:
+        budget.spend(len(posts))
+        print(f"📅 Publishing {len(posts)} scheduled post(s)")
+        list(executor.map(publish_post, posts))
+    return len(posts)
+
+
+def scheduler_loop(stop_event, concurrency=SCHEDULER_CONCURRENCY):
+    budget = PublishBudget()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        while not stop_event.is_set():
+            try:
+                claimed = run_scheduler_once(executor, budget)
+            except Exception as e:
+                print(f"⚠️ Scheduler error: {e}")
+                claimed = 0
+            # Keep draining while there's a backlog; otherwise wait for the next poll
+            if claimed == 0:
+                stop_event.wait(SCHEDULER_POLL_INTERVAL)
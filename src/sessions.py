@@ -0,0 +1,54 @@
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+
+# ---------------- SESSION CONFIG ----------------
+# Signs the session tokens /login hands out; without it no sessions are issued
+# Generate once with: python -c "import secrets; print(secrets.token_urlsafe(32))"
+SESSION_SECRET = os.getenv("SESSION_SECRET")
+SESSION_TTL = int(os.getenv("SESSION_TTL", 7 * 24 * 3600))
+
+
+class SessionError(Exception):
+    """Missing, forged or expired session token; the message is safe to show the user"""
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload):
+    if not SESSION_SECRET:
+        raise SessionError("SESSION_SECRET is not set; sessions are disabled")
+    return _b64encode(hmac.new(SESSION_SECRET.encode("utf-8"), payload.encode("ascii"), hashlib.sha256).digest())
+
+
+def issue_session_token(user_id, ttl=SESSION_TTL):
+    """Signed `<payload>.<signature>` token naming the user, valid for `ttl` seconds"""
+    claims = {"uid": user_id, "exp": int(time.time()) + ttl}
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify_session_token(token):
+    """The user_id a token was issued for; raises SessionError if it isn't valid"""
+    payload, _, signature = (token or "").partition(".")
+    if not payload or not signature:
+        raise SessionError("Malformed session token")
+    if not hmac.compare_digest(_sign(payload), signature):
+        raise SessionError("Invalid session token")
+    try:
+        claims = json.loads(_b64decode(payload))
+        user_id, expires_at = int(claims["uid"]), claims["exp"]
+    except (ValueError, KeyError, TypeError):
+        raise SessionError("Malformed session token")
+    if expires_at < time.time():
+        raise SessionError("Session expired, please log in again")
+    return user_id
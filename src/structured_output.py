@@ -0,0 +1,359 @@
+import os
+import re
+import json
+import threading
+from typing import List
+from pydantic import BaseModel, ValidationError, field_validator
+
+# ---------------- STRUCTURED OUTPUT CONFIG ----------------
+# Extra LLM calls allowed when a reply can't be parsed or repaired
+LLM_MAX_REPROMPTS = int(os.getenv("LLM_MAX_REPROMPTS", 1))
+
+FENCE_RE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+REPROMPT = (
+    "Your previous reply could not be used: {error}. "
+    "Reply again with only the JSON object in the requested format, no markdown or extra text."
+)
+
+
+class StructuredOutputError(ValueError):
+    """LLM reply isn't (and couldn't be repaired into) the expected JSON"""
+
+
+class PostContent(BaseModel):
+    """What build_content_prompt asks the LLM for"""
+
+    content_draft: str
+    hashtag_suggestions: List[str] = []
+    image_instructions: List[str] = []
+
+    @field_validator("content_draft")
+    @classmethod
+    def not_empty(cls, value):
+        if not value.strip():
+            raise ValueError("content_draft is empty")
+        return value.strip()
+
+    @field_validator("hashtag_suggestions", mode="before")
+    @classmethod
+    def split_hashtags(cls, value):
+        if isinstance(value, str):
+            value = value.replace(",", " ").split()
+        return ["#" + str(tag).strip().lstrip("#") for tag in value or [] if str(tag).strip().lstrip("#")]
+
+    @field_validator("image_instructions", mode="before")
+    @classmethod
+    def listify(cls, value):
+        if isinstance(value, str):
+            value = [value]
+        return [str(item).strip() for item in value or [] if str(item).strip()]
+
+
+def strip_fences(text):
+    """Body of the first ``` fenced block, or the text unchanged"""
+    match = FENCE_RE.search(text)
+    return match.group(1) if match else text
+
+
+def extract_json(text):
+    """First complete JSON object in the text; anything after it is ignored"""
+    decoder = json.JSONDecoder()
+    start = text.find("{")
+    while start != -1:
+        try:
+            value, _ = decoder.raw_decode(text, start)
+        except json.JSONDecodeError:
+            start = text.find("{", start + 1)
+            continue
+        if isinstance(value, dict):
+            return value
+        start = text.find("{", start + 1)
+    raise StructuredOutputError("No JSON object in response")
+
+
+def repair_json(text):
+    """Cheap fixes for the usual LLM JSON mistakes, without another LLM call.
+
+    Straightens smart quotes, escapes raw newlines inside strings, drops
+    trailing commas and trailing text, and closes strings/brackets left open
+    by a truncated reply.
+    """
+    start = text.find("{")
+    if start == -1:
+        raise StructuredOutputError("No JSON object in response")
+    text = text[start:].translate(SMART_QUOTES)
+
+    out, stack = [], []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char == "\n":
+                char = "\\n"
+            elif char in "\r\t":
+                char = "\\r" if char == "\r" else "\\t"
+            out.append(char)
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            while out and out[-1] in " \n\r\t,":
+                out.pop()
+            if stack:
+                stack.pop()
+        out.append(char)
+        if not stack:
+            break
+
+    if in_string:
+        out.append('"')
+    while out and out[-1] in " \n\r\t,":
+        out.pop()
+    out.extend(reversed(stack))
+
+    try:
+        return json.loads("".join(out))
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"Unrepairable JSON in response: {e}")
+
+
+def validate_post_content(data):
+    try:
+        return PostContent.model_validate(data).model_dump()
+    except ValidationError as e:
+        problems = "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+        raise StructuredOutputError(f"Response doesn't match the post schema ({problems})")
+
+
+def parse_post_content(response):
+    """LLM reply (message or text) -> validated post dict; returns (content_data, repaired)"""
+    text = response.content if hasattr(response, "content") else str(response)
+    text = strip_fences(text)
+    try:
+        data = extract_json(text)
+        repaired = False
+    except StructuredOutputError:
+        data = repair_json(text)
+        repaired = True
+    return validate_post_content(data), repaired
+
+
+class PostFieldParser:
+    """Incremental scanner over a streamed JSON reply.
+
+    feed() returns field events as soon as each value is complete:
+    {"field": "content_draft" / "hashtag_suggestions", "value": ...} and one
+    {"field": "image_instruction", "index": i, "value": ...} per array entry,
+    so image generation can start before the reply is finished. Text before
+    the first "{" (code fences, preambles) and after the object is ignored.
+    The complete reply still goes through parse_post_content afterwards.
+    """
+
+    FIELDS = ("content_draft", "hashtag_suggestions")
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._started = self._done = False
+        self._in_string = self._escaped = False
+        self._expect_key = True
+        self._key = None
+        self._string_start = self._value_start = None
+        self._items = 0
+
+    def feed(self, text):
+        self._buffer += text
+        events = []
+        while self._pos < len(self._buffer) and not self._done:
+            i, char = self._pos, self._buffer[self._pos]
+            self._pos += 1
+            if not self._started:
+                if char == "{":
+                    self._started, self._depth = True, 1
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._string_done(i + 1, events)
+                continue
+
+            if char == '"':
+                self._in_string, self._string_start = True, i
+                if self._depth == 1 and not self._expect_key:
+                    self._value_start = i
+            elif char in "{[":
+                if self._depth == 1:
+                    self._value_start = i
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    self._value_done(i + 1, events)
+                elif self._depth == 0:
+                    self._done = True
+            elif self._depth == 1 and char == ":":
+                self._expect_key = False
+            elif self._depth == 1 and char == ",":
+                self._expect_key = True
+        return events
+
+    def _load(self, start, end):
+        try:
+            return json.loads(self._buffer[start:end], strict=False)
+        except json.JSONDecodeError:
+            return None
+
+    def _string_done(self, end, events):
+        if self._depth == 1 and self._expect_key:
+            self._key = self._load(self._string_start, end)
+        elif self._depth == 1:
+            self._value_done(end, events)
+        elif self._depth == 2 and self._key == "image_instructions":
+            value = self._load(self._string_start, end)
+            if isinstance(value, str) and value.strip():
+                events.append({"field": "image_instruction", "index": self._items, "value": value.strip()})
+                self._items += 1
+
+    def _value_done(self, end, events):
+        if self._key in self.FIELDS:
+            value = self._load(self._value_start, end)
+            if value is not None:
+                events.append({"field": self._key, "value": value.strip() if isinstance(value, str) else value})
+
+
+def post_field_events(content_data):
+    """The events PostFieldParser would produce for an already-parsed post, then the post itself"""
+    events = [{"field": field, "value": content_data[field]} for field in PostFieldParser.FIELDS]
+    events += [
+        {"field": "image_instruction", "index": i, "value": value}
+        for i, value in enumerate(content_data["image_instructions"])
+    ]
+    return events + [{"field": "post", "value": content_data}]
+
+
+def chunk_text(chunk):
+    content = chunk.content if hasattr(chunk, "content") else chunk
+    if isinstance(content, list):
+        # Some providers stream content blocks instead of plain strings
+        return "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+    return str(content)
+
+
+class StructuredOutputStats:
+    """How often LLM replies need repair or a second call (each re-prompt doubles the cost)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "responses": 0, "clean": 0, "repaired": 0, "invalid": 0, "reprompts": 0, "failures": 0}
+
+    def record(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        with self._lock:
+            responses = self._stats["responses"]
+            requests = self._stats["requests"]
+            return {
+                **self._stats,
+                "parse_failure_rate": round((self._stats["repaired"] + self._stats["invalid"]) / responses, 3) if responses else 0.0,
+                "reprompt_rate": round(self._stats["reprompts"] / requests, 3) if requests else 0.0,
+                "failure_rate": round(self._stats["failures"] / requests, 3) if requests else 0.0,
+            }
+
+
+structured_output_stats = StructuredOutputStats()
+
+
+def _accept(response):
+    """Parse one reply and count the outcome; re-raises StructuredOutputError"""
+    structured_output_stats.record("responses")
+    try:
+        content_data, repaired = parse_post_content(response)
+    except StructuredOutputError:
+        structured_output_stats.record("invalid")
+        raise
+    structured_output_stats.record("repaired" if repaired else "clean")
+    return content_data
+
+
+def _reprompt_messages(prompt, response, error):
+    text = response.content if hasattr(response, "content") else str(response)
+    return [("human", prompt), ("ai", text), ("human", REPROMPT.format(error=error))]
+
+
+def _finish(llm, prompt, response, max_reprompts):
+    for attempt in range(max_reprompts + 1):
+        try:
+            return _accept(response)
+        except StructuredOutputError as e:
+            if attempt == max_reprompts:
+                structured_output_stats.record("failures")
+                raise
+            print(f"⚠️ Unusable LLM JSON, re-prompting: {e}")
+            structured_output_stats.record("reprompts")
+            response = llm.invoke(_reprompt_messages(prompt, response, e))
+
+
+async def _afinish(llm, prompt, response, max_reprompts):
+    for attempt in range(max_reprompts + 1):
+        try:
+            return _accept(response)
+        except StructuredOutputError as e:
+            if attempt == max_reprompts:
+                structured_output_stats.record("failures")
+                raise
+            print(f"⚠️ Unusable LLM JSON, re-prompting: {e}")
+            structured_output_stats.record("reprompts")
+            response = await llm.ainvoke(_reprompt_messages(prompt, response, e))
+
+
+def generate_post_content(llm, prompt, max_reprompts=LLM_MAX_REPROMPTS):
+    """Call the LLM and return a validated post dict, re-prompting only if repair fails"""
+    structured_output_stats.record("requests")
+    return _finish(llm, prompt, llm.invoke(prompt), max_reprompts)
+
+
+async def agenerate_post_content(llm, prompt, max_reprompts=LLM_MAX_REPROMPTS):
+    """Async generate_post_content"""
+    structured_output_stats.record("requests")
+    return await _afinish(llm, prompt, await llm.ainvoke(prompt), max_reprompts)
+
+
+def stream_post_content(llm, prompt, max_reprompts=LLM_MAX_REPROMPTS):
+    """Stream the LLM reply, yielding PostFieldParser events as fields complete,
+    then {"field": "post", "value": content_data} once the whole reply is validated"""
+    structured_output_stats.record("requests")
+    parser, chunks = PostFieldParser(), []
+    for chunk in llm.stream(prompt):
+        text = chunk_text(chunk)
+        chunks.append(text)
+        yield from parser.feed(text)
+    yield {"field": "post", "value": _finish(llm, prompt, "".join(chunks), max_reprompts)}
+
+
+async def astream_post_content(llm, prompt, max_reprompts=LLM_MAX_REPROMPTS):
+    """Async stream_post_content"""
+    structured_output_stats.record("requests")
+    parser, chunks = PostFieldParser(), []
+    async for chunk in llm.astream(prompt):
+        text = chunk_text(chunk)
+        chunks.append(text)
+        for event in parser.feed(text):
+            yield event
+    yield {"field": "post", "value": await _afinish(llm, prompt, "".join(chunks), max_reprompts)}
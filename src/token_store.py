@@ -0,0 +1,276 @@
+import os
+import time
+import threading
+from cryptography.fernet import Fernet, InvalidToken
+from src.db import get_conn
+from src.linkedin_client import linkedin_client
+
+# ---------------- TOKEN STORE CONFIG ----------------
+# Generate once with: python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())"
+TOKEN_ENCRYPTION_KEY = os.getenv("TOKEN_ENCRYPTION_KEY")
+# Refresh tokens this long before they expire
+TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", 24 * 3600))
+TOKEN_REFRESH_BATCH = int(os.getenv("TOKEN_REFRESH_BATCH", 50))
+# A refresh claim older than this is assumed abandoned (crashed worker) and can be taken over
+TOKEN_REFRESH_LEASE = 300
+# A cached token due for refresh tries again this often, not on every call
+TOKEN_REFRESH_RETRY = 60
+
+LINKEDIN_TOKEN_URL = "https://www.linkedin.com/oauth/v2/accessToken"
+
+
+class TokenStoreError(Exception):
+    """Token store is misconfigured or a token could not be refreshed"""
+
+
+def _fernet():
+    if not TOKEN_ENCRYPTION_KEY:
+        raise TokenStoreError("TOKEN_ENCRYPTION_KEY is not set; refusing to store LinkedIn tokens")
+    return Fernet(TOKEN_ENCRYPTION_KEY.encode())
+
+
+def encrypt(value):
+    return _fernet().encrypt(value.encode("utf-8")).decode("ascii") if value else None
+
+
+def decrypt(value):
+    if not value:
+        return None
+    try:
+        return _fernet().decrypt(value.encode("ascii")).decode("utf-8")
+    except InvalidToken:
+        raise TokenStoreError("Stored token cannot be decrypted with the current TOKEN_ENCRYPTION_KEY")
+
+
+class TokenCache:
+    """user_id -> access_token until it expires, so posting skips the DB and decryption"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "refreshes": 0, "refresh_failures": 0}
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry["expires_at"] > time.time():
+                self._stats["hits"] += 1
+                return entry["access_token"]
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, user_id, access_token, expires_at, refreshable=False):
+        """`refreshable`: a refresh token is stored, so refresh inside TOKEN_REFRESH_MARGIN"""
+        refresh_at = None
+        if refreshable:
+            # Already inside the margin (a refresh just failed or is underway elsewhere): look again later
+            refresh_at = max(expires_at - TOKEN_REFRESH_MARGIN, time.time() + TOKEN_REFRESH_RETRY)
+        with self._lock:
+            self._entries[user_id] = {"access_token": access_token, "expires_at": expires_at, "refresh_at": refresh_at}
+
+    def expires_in(self, user_id):
+        """Seconds the cached token has left, or None if it isn't cached"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            return entry["expires_at"] - time.time() if entry else None
+
+    def due_for_refresh(self, user_id):
+        """True, at most once per TOKEN_REFRESH_RETRY, once the cached token should be refreshed"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if not entry or entry["refresh_at"] is None or entry["refresh_at"] > now:
+                return False
+            entry["refresh_at"] = now + TOKEN_REFRESH_RETRY
+            return True
+
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def record(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
+
+
+token_cache = TokenCache()
+
+
+def _write_tokens(cur, user_id, token_json):
+    """Upsert a LinkedIn token response (access + optional refresh), encrypted; returns expires_at"""
+    now = time.time()
+    expires_at = now + int(token_json.get("expires_in") or 0)
+    refresh_token = token_json.get("refresh_token")
+    refresh_expires_at = now + int(token_json["refresh_token_expires_in"]) if token_json.get("refresh_token_expires_in") else None
+
+    cur.execute("""
+    INSERT INTO linkedin_tokens (user_id, access_token, refresh_token, expires_at, refresh_expires_at)
+    VALUES (%s, %s, %s, TO_TIMESTAMP(%s), TO_TIMESTAMP(%s))
+    ON CONFLICT (user_id) DO UPDATE
+    SET access_token = EXCLUDED.access_token,
+        refresh_token = COALESCE(EXCLUDED.refresh_token, linkedin_tokens.refresh_token),
+        expires_at = EXCLUDED.expires_at,
+        refresh_expires_at = COALESCE(EXCLUDED.refresh_expires_at, linkedin_tokens.refresh_expires_at),
+        refreshing_at = NULL, updated_at = CURRENT_TIMESTAMP
+    """, (user_id, encrypt(token_json["access_token"]), encrypt(refresh_token), expires_at, refresh_expires_at))
+    return expires_at
+
+
+def save_tokens(user_id, token_json):
+    """Store the tokens from a LinkedIn token response for this user"""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        expires_at = _write_tokens(cur, user_id, token_json)
+        conn.commit()
+        cur.close()
+
+    token_cache.set(user_id, token_json["access_token"], expires_at, refreshable=bool(token_json.get("refresh_token")))
+
+
+def _exchange_refresh_token(user_id, refresh_token):
+    try:
+        response = linkedin_client.post(LINKEDIN_TOKEN_URL, data={
+            'grant_type': 'refresh_token',
+            'refresh_token': refresh_token,
+            'client_id': os.getenv('CLIENT_ID'),
+            'client_secret': os.getenv('CLIENT_SECRET'),
+        }, idempotent=False)
+        token_json = response.json()
+    except Exception as e:
+        token_cache.record("refresh_failures")
+        raise TokenStoreError(f"LinkedIn token refresh failed for user {user_id}: {e}")
+    if 'access_token' not in token_json:
+        token_cache.record("refresh_failures")
+        raise TokenStoreError(f"LinkedIn token refresh failed for user {user_id}: {token_json}")
+    token_cache.record("refreshes")
+    print(f"🔄 Refreshed LinkedIn token for user {user_id}")
+    return token_json
+
+
+def refresh_tokens(user_id, refresh_token):
+    """Exchange a refresh token for a new access token and store it"""
+    token_json = _exchange_refresh_token(user_id, refresh_token)
+    save_tokens(user_id, token_json)
+    return token_json['access_token']
+
+
+CLAIMABLE = "(refreshing_at IS NULL OR refreshing_at < CURRENT_TIMESTAMP - make_interval(secs => %s))"
+
+def claim_refreshes(where, params, limit):
+    """Mark matching rows as being refreshed and commit; returns [(user_id, refresh_token)].
+
+    The claim is committed before any HTTP call, so no transaction or row
+    lock is held while LinkedIn answers, and nobody else refreshes the same
+    user meanwhile (a refresh token is single use).
+    """
+    with get_conn() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(f"""
+            UPDATE linkedin_tokens SET refreshing_at = CURRENT_TIMESTAMP
+            WHERE user_id IN (
+                SELECT user_id FROM linkedin_tokens
+                WHERE refresh_token IS NOT NULL AND {where} AND {CLAIMABLE}
+                ORDER BY expires_at
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING user_id, refresh_token
+            """, (*params, TOKEN_REFRESH_LEASE, limit))
+            claimed = cur.fetchall()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+    return [(user_id, decrypt(refresh_token)) for user_id, refresh_token in claimed]
+
+
+def release_refresh(user_id):
+    """Give a claim back after a failed refresh so the next run can try again"""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("UPDATE linkedin_tokens SET refreshing_at = NULL WHERE user_id = %s", (user_id,))
+        conn.commit()
+        cur.close()
+
+
+def refresh_claimed(user_id, refresh_token):
+    """Refresh one claimed user and store the result in its own transaction; returns the new token"""
+    try:
+        return refresh_tokens(user_id, refresh_token)
+    except Exception:
+        release_refresh(user_id)
+        raise
+
+
+def refresh_if_unclaimed(user_id):
+    """Refresh now unless someone else already is (or already did); returns the new token or None"""
+    try:
+        where = "user_id = %s AND expires_at < CURRENT_TIMESTAMP + make_interval(secs => %s)"
+        for claimed_user, claimed_token in claim_refreshes(where, (user_id, TOKEN_REFRESH_MARGIN), 1):
+            return refresh_claimed(claimed_user, claimed_token)
+    except Exception as e:
+        print(f"⚠️ {e}")
+    return None
+
+
+def get_access_token(user_id):
+    """Read-through lookup of a user's access token, refreshing it if it is about to expire"""
+    cached_token = token_cache.get(user_id)
+    # Cached tokens are served until they expire; one near expiry goes back to the DB
+    # (to refresh it, or pick up the worker's refresh) at most once per TOKEN_REFRESH_RETRY
+    if cached_token and not token_cache.due_for_refresh(user_id):
+        return cached_token
+
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+        SELECT access_token, refresh_token, EXTRACT(EPOCH FROM expires_at)
+        FROM linkedin_tokens WHERE user_id = %s
+        """, (user_id,))
+        row = cur.fetchone()
+        cur.close()
+
+    if not row:
+        return None
+    access_token, refresh_token, expires_at = decrypt(row[0]), decrypt(row[1]), float(row[2])
+
+    if expires_at - TOKEN_REFRESH_MARGIN <= time.time() and refresh_token:
+        # Only one caller refreshes; the others keep using the current token while it lasts
+        refreshed = refresh_if_unclaimed(user_id)
+        if refreshed:
+            return refreshed
+
+    if expires_at <= time.time():
+        return None
+    token_cache.set(user_id, access_token, expires_at, refreshable=bool(refresh_token))
+    return access_token
+
+
+def refresh_expiring_tokens(margin=TOKEN_REFRESH_MARGIN, batch_size=TOKEN_REFRESH_BATCH):
+    """Refresh tokens expiring within `margin` seconds; returns how many were refreshed.
+
+    Rows are claimed up front (see claim_refreshes), then each user is
+    refreshed and written in its own short transaction; the token cache is
+    only updated once that write has committed.
+    """
+    claimed = claim_refreshes("""
+        expires_at < CURRENT_TIMESTAMP + make_interval(secs => %s)
+        AND (refresh_expires_at IS NULL OR refresh_expires_at > CURRENT_TIMESTAMP)
+    """, (margin,), batch_size)
+
+    refreshed = 0
+    for user_id, refresh_token in claimed:
+        try:
+            refresh_claimed(user_id, refresh_token)
+            refreshed += 1
+        except Exception as e:
+            print(f"⚠️ {e}")
+    return refreshed
@@ -0,0 +1,137 @@
+import os
+import time
+import threading
+from dotenv import load_dotenv
+from src.db import init_pool, DB_POOL_MAX
+from src.jobs import claim_job, complete_job, fail_job, requeue_stale_jobs, PermanentJobError
+from src.scheduler import scheduler_loop, requeue_stale_posts, SCHEDULER_CONCURRENCY
+from src.enrichment import enrichment_loop, ENRICH_CONCURRENCY
+from src.run_agent import run_agent, create_and_post_linkedin_content
+from src.linkedin_auth import resolve_linkedin_urn
+from src.token_store import get_access_token, refresh_expiring_tokens
+from src.user_details import load_client_info
+load_dotenv()
+
+# ---------------- WORKER CONFIG ----------------
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 2))
+# Stale-job requeue and LinkedIn token refresh run this often
+MAINTENANCE_INTERVAL = 60
+
+
+def run_makepost_job(payload):
+    """Same pipeline as /makepost, run outside the request"""
+    client_info = load_client_info(payload["user_id"])
+    if client_info is None:
+        raise Exception(f"No profile uploaded for user_id {payload['user_id']}")
+    result = run_agent(
+        client_info=client_info,
+        post_type="carousel",
+        target_industry=client_info.get('industry'),
+        content_goals=payload["contentRequirements"] + " Tone of the post = " + payload["postTone"]
+    )
+    if result is None:
+        raise Exception("Content generation failed")
+    result["name"] = client_info['name']
+    result["industry"] = client_info['industry']
+    return result
+
+
+def run_postcontent_job(payload):
+    """Same work as /postcontent, run outside the request"""
+    access_token = payload.get("access_token") or get_access_token(payload["user_id"])
+    if not access_token:
+        raise Exception(f"No valid LinkedIn token stored for user {payload['user_id']}")
+    linkedin_urn = resolve_linkedin_urn(access_token, payload.get("user_id"))
+    result = create_and_post_linkedin_content(
+        content_data=payload["content_data"],
+        image_urls=payload["image_urls"],
+        post_type=payload["post_type"],
+        linkedin_urn=linkedin_urn,
+        access_token=access_token
+    )
+    if not result.get("success") and result.get("outcome_unknown"):
+        # The post may be live; running the job again could publish it twice
+        raise PermanentJobError(f"LinkedIn post outcome unknown: {result['error']}")
+    if not result.get("success"):
+        raise Exception(result.get("error", "LinkedIn post failed"))
+    return result
+
+
+JOB_HANDLERS = {
+    "makepost": run_makepost_job,
+    "postcontent": run_postcontent_job,
+}
+
+
+def run_one_job():
+    """Claim and run a single job; returns False when the queue had nothing due"""
+    job = claim_job()
+    if job is None:
+        return False
+
+    print(f"▶️ Job {job['id']} ({job['kind']}) attempt {job['attempts']}/{job['max_attempts']}")
+    try:
+        result = JOB_HANDLERS[job["kind"]](job["payload"])
+    except PermanentJobError as e:
+        print(f"❌ Job {job['id']} failed, not retrying: {e}")
+        fail_job(job["id"], str(e), job["attempts"], job["max_attempts"], retry=False)
+    except Exception as e:
+        print(f"❌ Job {job['id']} failed: {e}")
+        fail_job(job["id"], str(e), job["attempts"], job["max_attempts"])
+    else:
+        complete_job(job["id"], result)
+        print(f"✅ Job {job['id']} done")
+    return True
+
+
+def worker_loop(stop_event):
+    while not stop_event.is_set():
+        try:
+            if not run_one_job():
+                stop_event.wait(JOB_POLL_INTERVAL)
+        except Exception as e:
+            # DB hiccup; back off instead of spinning
+            print(f"⚠️ Worker error: {e}")
+            stop_event.wait(JOB_POLL_INTERVAL)
+
+
+def run_maintenance():
+    try:
+        requeued = requeue_stale_jobs()
+        if requeued:
+            print(f"♻️ Recovered {requeued} stale job(s) (makepost requeued until out of attempts, others failed)")
+        requeued = requeue_stale_posts()
+        if requeued:
+            print(f"♻️ Marked {requeued} stale scheduled post(s) unknown (worker lost mid-publish)")
+        refreshed = refresh_expiring_tokens()
+        if refreshed:
+            print(f"🔄 Refreshed {refreshed} LinkedIn token(s) ahead of expiry")
+    except Exception as e:
+        print(f"⚠️ Maintenance error: {e}")
+
+
+def main(workers=JOB_WORKERS):
+    # Each job can also hit the pool from its image threads (cache lookups)
+    init_pool(maxconn=max(DB_POOL_MAX, workers * 4 + SCHEDULER_CONCURRENCY + ENRICH_CONCURRENCY + 2))
+    stop_event = threading.Event()
+    threads = [threading.Thread(target=worker_loop, args=(stop_event,), daemon=True) for _ in range(workers)]
+    threads.append(threading.Thread(target=scheduler_loop, args=(stop_event,), daemon=True))
+    threads.append(threading.Thread(target=enrichment_loop, args=(stop_event,), daemon=True))
+    for t in threads:
+        t.start()
+    print(f"🚀 Job worker running with {workers} thread(s) plus the post scheduler and website enrichment")
+
+    try:
+        while True:
+            run_maintenance()
+            time.sleep(MAINTENANCE_INTERVAL)
+    except KeyboardInterrupt:
+        stop_event.set()
+        for t in threads:
+            t.join()
+
+
+if __name__ == "__main__":
+    # python -m src.worker
+    main()
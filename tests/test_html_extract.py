@@ -0,0 +1,125 @@
+import socket
+import ipaddress
+import pytest
+import src.html_extract as html_extract
+from src.html_extract import fetch_html, check_public_url, UnsafeURLError
+
+ADDRESSES = {
+    "acme.test": "93.184.216.34",
+    "intranet.acme.test": "10.0.0.5",
+    "metadata.google.internal": "169.254.169.254",
+    "localhost": "127.0.0.1",
+    "v6.acme.test": "::ffff:127.0.0.1",
+}
+
+
+class FakeResponse:
+    def __init__(self, url, status_code=200, headers=None, body=b"<html><body><p>Hi</p></body></html>"):
+        self.url = url
+        self.status_code = status_code
+        self.headers = {"Content-Type": "text/html", **(headers or {})}
+        self.body = body
+
+    @property
+    def is_redirect(self):
+        return "Location" in self.headers and self.status_code in (301, 302, 303, 307, 308)
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, size):
+        yield self.body
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class FakeSession:
+    """Serves `routes` (url -> FakeResponse) and records every URL requested"""
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.requested = []
+
+    def get(self, url, allow_redirects=True, **kwargs):
+        assert allow_redirects is False
+        self.requested.append(url)
+        return self.routes[url]
+
+
+@pytest.fixture(autouse=True)
+def fake_dns(monkeypatch):
+    def getaddrinfo(host, port, *args, **kwargs):
+        try:
+            address = str(ipaddress.ip_address(host))
+        except ValueError:
+            if host not in ADDRESSES:
+                raise socket.gaierror("Name or service not known")
+            address = ADDRESSES[host]
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port))]
+    monkeypatch.setattr(html_extract.socket, "getaddrinfo", getaddrinfo)
+    monkeypatch.setattr(html_extract, "FETCH_ALLOW_PRIVATE_HOSTS", False)
+
+
+def use_session(monkeypatch, routes):
+    session = FakeSession(routes)
+    monkeypatch.setattr(html_extract, "get_session", lambda: session)
+    return session
+
+
+@pytest.mark.parametrize("url", [
+    "http://localhost:8000/",
+    "http://127.0.0.1/",
+    "http://[::1]/",
+    "http://10.1.2.3/",
+    "http://192.168.0.1/",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://metadata.google.internal/",
+    "http://intranet.acme.test/",
+    "http://v6.acme.test/",
+    "file:///etc/passwd",
+])
+def test_non_public_hosts_are_refused(url):
+    with pytest.raises(UnsafeURLError):
+        check_public_url(url)
+
+
+def test_public_host_is_fetched(monkeypatch):
+    session = use_session(monkeypatch, {"https://acme.test/": FakeResponse("https://acme.test/")})
+
+    page = fetch_html("https://acme.test/")
+
+    assert page["url"] == "https://acme.test/"
+    assert session.requested == ["https://acme.test/"]
+
+
+def test_redirect_to_metadata_address_is_not_followed(monkeypatch):
+    session = use_session(monkeypatch, {
+        "https://acme.test/": FakeResponse("https://acme.test/", 302, {"Location": "http://169.254.169.254/latest/"}),
+    })
+
+    with pytest.raises(UnsafeURLError):
+        fetch_html("https://acme.test/")
+    assert session.requested == ["https://acme.test/"]
+
+
+def test_relative_redirect_is_followed(monkeypatch):
+    use_session(monkeypatch, {
+        "https://acme.test/": FakeResponse("https://acme.test/", 301, {"Location": "/home"}),
+        "https://acme.test/home": FakeResponse("https://acme.test/home"),
+    })
+
+    assert fetch_html("https://acme.test/")["url"] == "https://acme.test/home"
+
+
+def test_private_hosts_allowed_when_configured(monkeypatch):
+    monkeypatch.setattr(html_extract, "FETCH_ALLOW_PRIVATE_HOSTS", True)
+    use_session(monkeypatch, {"http://127.0.0.1:8000/": FakeResponse("http://127.0.0.1:8000/")})
+
+    assert fetch_html("http://127.0.0.1:8000/")["url"] == "http://127.0.0.1:8000/"
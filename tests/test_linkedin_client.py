@@ -0,0 +1,91 @@
+import pytest
+import src.linkedin_client as linkedin
+from src.linkedin_client import LinkedInClient, LinkedInUnavailable
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    """Answers with the queued responses (or raises queued exceptions) in order"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(linkedin.time, "sleep", lambda seconds: None)
+    client = LinkedInClient()
+    client.breaker.cooldown = 0
+    # Open the breaker as a run of 5xx responses would
+    for _ in range(client.breaker.threshold):
+        client.breaker.record_failure()
+    assert client.breaker.state == "open"
+    return client
+
+
+def use_session(monkeypatch, session):
+    monkeypatch.setattr(linkedin, "get_session", lambda: session)
+    return session
+
+
+def test_probe_answered_with_429_closes_breaker(client, monkeypatch):
+    use_session(monkeypatch, FakeSession(FakeResponse(429), FakeResponse(200)))
+
+    response = client.get("https://api.linkedin.com/v2/userinfo", max_retries=0)
+
+    assert response.status_code == 429
+    assert client.breaker.state == "closed"
+    assert client.get("https://api.linkedin.com/v2/userinfo").status_code == 200
+
+
+def test_probe_rejected_by_rate_limit_lets_next_caller_probe(client, monkeypatch):
+    session = use_session(monkeypatch, FakeSession(FakeResponse(200)))
+    # Bucket is empty and won't refill within max_wait: the probe never leaves the process
+    client.app_bucket.pause(3600)
+
+    with pytest.raises(LinkedInUnavailable):
+        client.get("https://api.linkedin.com/v2/userinfo")
+    assert session.calls == 0
+
+    client.app_bucket = linkedin.TokenBucket(10, 10)
+    assert client.get("https://api.linkedin.com/v2/userinfo").status_code == 200
+    assert client.breaker.state == "closed"
+
+
+def test_probe_hitting_unexpected_error_lets_next_caller_probe(client, monkeypatch):
+    use_session(monkeypatch, FakeSession(ValueError("bad payload"), FakeResponse(200)))
+
+    with pytest.raises(ValueError):
+        client.get("https://api.linkedin.com/v2/userinfo")
+
+    assert client.get("https://api.linkedin.com/v2/userinfo").status_code == 200
+    assert client.breaker.state == "closed"
+
+
+def test_failed_probe_reopens_breaker(client, monkeypatch):
+    use_session(monkeypatch, FakeSession(FakeResponse(500)))
+    client.breaker.cooldown = 60
+
+    # Cooldown is over for the first probe only because it was opened with cooldown 0
+    client.breaker._opened_at -= 60
+    assert client.get("https://api.linkedin.com/v2/userinfo", max_retries=0).status_code == 500
+
+    assert client.breaker.state == "open"
+    with pytest.raises(LinkedInUnavailable):
+        client.get("https://api.linkedin.com/v2/userinfo")
@@ -0,0 +1,38 @@
+from src.user_details import ProfileCache
+
+
+def test_read_overtaken_by_invalidation_is_not_cached():
+    cache = ProfileCache(ttl=60)
+    _, missing, generation = cache.get_many([1, 2])
+    assert missing == [1, 2]
+
+    # An upload commits and invalidates user 1 while the old rows are still in flight
+    cache.invalidate(1)
+    cache.set_many({1: {"name": "old"}, 2: {"name": "Bo"}}, generation)
+
+    found, missing, _ = cache.get_many([1, 2])
+    assert found == {2: {"name": "Bo"}}
+    assert missing == [1]
+
+
+def test_read_after_invalidation_is_cached():
+    cache = ProfileCache(ttl=60)
+    cache.invalidate(1)
+    _, _, generation = cache.get_many([1])
+    cache.set_many({1: {"name": "new"}}, generation)
+
+    assert cache.get_many([1])[0] == {1: {"name": "new"}}
+
+
+def test_forgotten_generations_still_reject_older_reads():
+    cache = ProfileCache(ttl=60, max_entries=2)
+    _, _, before = cache.get_many([9])
+    cache.invalidate(1, 2)
+    cache.invalidate(3)
+
+    cache.set_many({9: None}, before)
+    assert cache.get_many([9])[1] == [9]
+
+    _, _, after = cache.get_many([9])
+    cache.set_many({9: None}, after)
+    assert cache.get_many([9])[0] == {9: None}